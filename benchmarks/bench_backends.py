@@ -0,0 +1,131 @@
+"""
+OCR latency and accuracy per inference configuration (backend, int8 / fp32, languages)
+
+Every configuration reads the same fixture images on the CPU; latency is the whole-frame
+ocr_image() time, accuracy the mean similarity of each drawn line to its best matching
+reading (generated fixtures only), and agreement the similarity of each frame's text to
+what the first configuration - the current default - read. Configurations that can't
+load (e.g. onnx without onnxruntime) are reported and skipped. Run from the project directory:
+
+    python -m benchmarks.bench_backends
+    python -m benchmarks.bench_backends --configs torch:int8:ja,en torch:int8:en onnx:int8:en --threads 4
+"""
+import argparse
+import difflib
+import json
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_pipeline import make_fixtures, fixture_lines
+
+# backend:precision:languages; the first one is the baseline (the app's default configuration)
+DEFAULT_CONFIGS = [
+    "torch:int8:ja,en",
+    "torch:fp32:ja,en",
+    "torch:int8:en",
+    "onnx:fp32:ja,en",
+    "onnx:int8:ja,en",
+    "onnx:int8:en",
+]
+
+
+def parse_config(config):
+    backend, precision, languages = config.split(":", 2)
+    if precision not in ("int8", "fp32"):
+        raise ValueError(f"precision must be int8 or fp32: {config}")
+    return backend, precision == "int8", tuple(languages.split(","))
+
+
+def similarity(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def frame_text(results):
+    """
+    Readings of one frame top to bottom, left to right, as one string
+    """
+    ordered = sorted(results, key=lambda r: (min(p[1] for p in r[0]), min(p[0] for p in r[0])))
+    return "\n".join(text for _, text, _ in ordered)
+
+
+def line_accuracy(results, lines):
+    """
+    Mean similarity of each expected line to its best matching reading
+    """
+    texts = [text for _, text, _ in results]
+    return float(np.mean([max((similarity(line, text) for text in texts), default=0.0) for line in lines]))
+
+
+def run_config(config, images, truth, repeat, threads):
+    from utils.ocr_engine import OCREngine
+    backend, quantize, languages = parse_config(config)
+    start = time.perf_counter()
+    engine = OCREngine(languages, gpu=False, backend=backend, quantize=quantize, threads=threads)
+    load = time.perf_counter() - start
+    engine.warm_up()
+
+    times, texts, accuracy = [], [], []
+    for _ in range(repeat):
+        for i, image in enumerate(images):
+            # every pass reads the frames from scratch
+            engine.crop_cache.clear()
+            start = time.perf_counter()
+            results = engine.ocr_image(image)
+            times.append((time.perf_counter() - start) * 1000)
+            if len(texts) < len(images):
+                texts.append(frame_text(results))
+                if truth is not None:
+                    accuracy.append(line_accuracy(results, truth[i]))
+    return {"load_s": load,
+            "p50": float(np.percentile(times, 50)),
+            "p95": float(np.percentile(times, 95)),
+            "accuracy": float(np.mean(accuracy)) if accuracy else None,
+            "texts": texts}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OCR latency / accuracy per inference configuration")
+    parser.add_argument("--configs", nargs="+", default=DEFAULT_CONFIGS,
+                        help="backend:int8|fp32:languages, first is the baseline")
+    parser.add_argument("--fixtures", help="directory of fixture images (default: generated, with known text)")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the fixtures")
+    parser.add_argument("--threads", type=int, default=0, help="CPU inference threads (0: library default)")
+    parser.add_argument("--output", help="write the results JSON here")
+    args = parser.parse_args(argv)
+
+    import cv2
+    from utils.frame_source import image_files, read_image
+    with tempfile.TemporaryDirectory() as scratch:
+        if args.fixtures:
+            paths = image_files(args.fixtures)
+            truth = None
+        else:
+            paths = make_fixtures(scratch)
+            truth = [fixture_lines(i) for i in range(len(paths))]
+        images = [cv2.cvtColor(read_image(path), cv2.COLOR_BGRA2BGR) for path in paths]
+
+    results = {}
+    for config in args.configs:
+        try:
+            results[config] = run_config(config, images, truth, args.repeat, args.threads)
+        except Exception as e:
+            print(f"{config}: skipped ({e})")
+
+    baseline = results.get(args.configs[0])
+    print(f"{'configuration':<20} {'load s':>7} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8} {'accuracy':>9} {'agreement':>10}")
+    for config, stats in results.items():
+        speedup = baseline["p50"] / stats["p50"] if baseline and stats["p50"] > 0 else float("nan")
+        agreement = (np.mean([similarity(a, b) for a, b in zip(stats["texts"], baseline["texts"])])
+                     if baseline else float("nan"))
+        stats["agreement"] = float(agreement)
+        accuracy = "-" if stats["accuracy"] is None else f"{stats['accuracy']:.3f}"
+        print(f"{config:<20} {stats['load_s']:>7.1f} {stats['p50']:>9.1f} {stats['p95']:>9.1f} "
+              f"{speedup:>7.2f}x {accuracy:>9} {agreement:>10.3f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark for OCR box merging: original pairwise loop vs utils.boxes
+
+Run from the project directory:
+    python -m benchmarks.bench_merge
+"""
+import random
+import timeit
+from utils import boxes
+
+
+def legacy_iou(box1, box2):
+    x1_min, y1_min = min(p[0] for p in box1), min(p[1] for p in box1)
+    x1_max, y1_max = max(p[0] for p in box1), max(p[1] for p in box1)
+    x2_min, y2_min = min(p[0] for p in box2), min(p[1] for p in box2)
+    x2_max, y2_max = max(p[0] for p in box2), max(p[1] for p in box2)
+
+    inter_w = max(0, min(x1_max, x2_max) - max(x1_min, x2_min))
+    inter_h = max(0, min(y1_max, y2_max) - max(y1_min, y2_min))
+    inter = inter_w * inter_h
+    area1 = (x1_max - x1_min) * (y1_max - y1_min)
+    area2 = (x2_max - x2_min) * (y2_max - y2_min)
+    union = area1 + area2 - inter
+    return inter / union if union > 0 else 0
+
+
+def legacy_merge(first_result, second_result):
+    CONF_FLOOR = 0.4
+    merged = []
+    filtered_original_result = [(box, txt, conf) for (box, txt, conf) in first_result if conf >= CONF_FLOOR]
+    filtered_grey_result = [(box, txt, conf) for (box, txt, conf) in second_result if conf >= CONF_FLOOR]
+
+    for candidate in filtered_original_result + filtered_grey_result:
+        box, txt, conf = candidate
+        keep = True
+        for i, (m_box, m_txt, m_conf) in enumerate(merged):
+            if legacy_iou(box, m_box) > 0.5:
+                if conf > m_conf:
+                    merged[i] = candidate
+                keep = False
+                break
+        if keep:
+            merged.append(candidate)
+    return merged
+
+
+def make_results(n, rng, width=2560, height=1440):
+    """
+    Random HUD-like results; roughly half the boxes jitter around an earlier one
+    so the two passes overlap the way colour and grey passes do
+    """
+    results = []
+    for i in range(n):
+        if results and rng.random() < 0.5:
+            (x0, y0), _, (x1, y1), _ = rng.choice(results)[0]
+            x0 += rng.randint(-4, 4)
+            y0 += rng.randint(-4, 4)
+        else:
+            x0, y0 = rng.randint(0, width - 200), rng.randint(0, height - 40)
+            x1, y1 = x0 + rng.randint(20, 200), y0 + rng.randint(10, 40)
+        w, h = x1 - x0, y1 - y0
+        box = [[x0, y0], [x0 + w, y0], [x0 + w, y0 + h], [x0, y0 + h]]
+        results.append((box, f"text{i}", rng.random()))
+    return results
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'boxes':>6} {'legacy ms':>10} {'numpy ms':>10} {'speedup':>8}")
+    for n in (10, 100, 1000):
+        first = make_results(n // 2, rng)
+        second = make_results(n - n // 2, rng)
+        assert boxes.merge_best_bbox(first, second) == legacy_merge(first, second)
+
+        repeat = 3 if n >= 1000 else 20
+        legacy = min(timeit.repeat(lambda: legacy_merge(first, second), number=1, repeat=repeat))
+        vector = min(timeit.repeat(lambda: boxes.merge_best_bbox(first, second), number=1, repeat=repeat))
+        print(f"{n:>6} {legacy * 1000:>10.2f} {vector * 1000:>10.2f} {legacy / vector:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Per-stage benchmark of the capture -> OCR -> translate -> paint pipeline
+
+Runs OCRWorker with a CPU reader and the stub translator over fixture images and
+reports p50 / p95 per stage. Without --fixtures a deterministic synthetic set is
+generated; --session replays a recorded session (see utils.session_store) instead.
+Run from the project directory:
+
+    python -m benchmarks.bench_pipeline --output bench.json
+    python -m benchmarks.bench_pipeline --baseline bench.json   # exit 1 on p95 regressions
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+import cv2
+import numpy as np
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+from PySide6.QtGui import QGuiApplication
+
+LINES = [
+    "NEW GAME", "CONTINUE", "OPTIONS", "HP 120/120  MP 45/60",
+    "Press START to begin", "The door is locked.", "Gold: 1500", "Quest updated",
+]
+
+
+def fixture_lines(i):
+    """
+    Text lines drawn on the i-th fixture, top to bottom
+    """
+    return [LINES[(i + j) % len(LINES)] for j in range(4 + i % 4)]
+
+
+def make_fixtures(directory, count=6, width=1280, height=720):
+    """
+    Deterministic menu / dialogue style frames with Hershey-font text
+    """
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        image[:] = rng.integers(20, 80, size=3, dtype=np.uint8)
+        for j, text in enumerate(fixture_lines(i)):
+            org = (int(rng.integers(20, width // 2)), int(80 + j * 140))
+            color = tuple(int(c) for c in rng.integers(160, 256, size=3))
+            cv2.putText(image, text, org, cv2.FONT_HERSHEY_SIMPLEX, 1.2 + (j % 3) * 0.4, color, 2, cv2.LINE_AA)
+        path = os.path.join(directory, f"fixture_{i:02d}.png")
+        cv2.imwrite(path, image)
+        paths.append(path)
+    return paths
+
+
+def run(args, scratch):
+    # a scratch ini, so the benchmark never touches the user's settings and doesn't depend on them
+    from utils.settings import use_settings_file, set_setting
+    use_settings_file(os.path.join(scratch, "settings.ini"))
+    set_setting("translation/provider", "Stub")
+    set_setting("translation/stub_latency_ms", args.latency_ms)
+    set_setting("ocr/incremental", False)
+    set_setting("ocr/dual_pass", args.dual_pass)
+    set_setting("ocr/warmup", False)
+    set_setting("ocr/tracking", False)
+    set_setting("ocr/group_paragraphs", True)
+    set_setting("session/record", False)
+
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+    from utils.ocr import OCRWorker
+    from utils.frame_source import ReplayFrameSource
+
+    if args.session:
+        # replay a recorded session: its distinct frames, in recording order
+        from utils.session_store import SessionFrameSource
+        open_source = partial(SessionFrameSource, args.session)
+    else:
+        directory = args.fixtures
+        if not directory:
+            directory = os.path.join(scratch, "fixtures")
+            os.makedirs(directory)
+            make_fixtures(directory)
+        open_source = partial(ReplayFrameSource, directory)
+
+    worker = OCRWorker(gpu=False)
+    worker.load_model()
+    segments = []
+    worker.stats_ready.connect(lambda stats: segments.append(stats["layout"]) if stats.get("layout") else None)
+    copies = []
+    worker.stats_ready.connect(lambda stats: copies.append(stats["copies"]))
+    if args.warmup:
+        source = open_source()
+        try:
+            worker.run_OCR(source.grab())
+        finally:
+            source.close()
+        worker.metrics.reset()
+
+    for _ in range(args.repeat):
+        # a fresh source per pass, so every pass decodes the frames from scratch
+        source = open_source()
+        try:
+            while True:
+                start = time.perf_counter()
+                frame = source.grab()
+                if frame is None:
+                    break
+                worker.metrics.record({"capture": time.perf_counter() - start})
+                worker.run_OCR(frame)
+                # let the background translation land before the next frame
+                while worker.translation_pipeline.pending():
+                    app.processEvents()
+                    time.sleep(0.001)
+                app.processEvents()
+        finally:
+            source.close()
+
+    worker.shutdown()
+    if copies:
+        print(f"bytes copied per frame: {np.mean([c['copied'] for c in copies]) / 1e6:.1f} MB "
+              f"for {np.mean([c['frame'] for c in copies]) / 1e6:.1f} MB captured")
+    if segments:
+        print(f"segments per frame: {np.mean([s['segments_in'] for s in segments]):.1f} before grouping, "
+              f"{np.mean([s['segments_out'] for s in segments]):.1f} after")
+    return worker.metrics.summary()
+
+
+def compare(summary, baseline, tolerance):
+    regressions = []
+    for stage, stats in summary.items():
+        old = baseline.get(stage)
+        if old and stats["p95"] > old["p95"] * (1 + tolerance) and stats["p95"] - old["p95"] > 1.0:
+            regressions.append(f"{stage}: p95 {old['p95']:.1f} -> {stats['p95']:.1f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-stage OCR pipeline benchmark")
+    parser.add_argument("--fixtures", help="directory of fixture images (default: generated)")
+    parser.add_argument("--session", help="recorded session directory to replay instead of fixtures")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the fixtures")
+    parser.add_argument("--latency-ms", type=int, default=150, help="stub translator latency")
+    parser.add_argument("--dual-pass", action="store_true")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false")
+    parser.add_argument("--output", help="write the summary JSON here")
+    parser.add_argument("--baseline", help="summary JSON to compare p95s against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        summary = run(args, scratch)
+
+    print(f"{'stage':<20} {'n':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    for stage, stats in sorted(summary.items()):
+        print(f"{stage:<20} {stats['n']:>5} {stats['p50']:>9.1f} {stats['p95']:>9.1f}")
+    # informational only, not part of the compared summary
+    from utils.memory import memory_stats, format_memory
+    print(format_memory(memory_stats()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(summary, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
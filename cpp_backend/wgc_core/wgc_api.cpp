@@ -4,6 +4,8 @@
 #include <dxgi.h>
 #include <wrl/client.h>
 
+#include <condition_variable>
+#include <mutex>
 #include <thread>
 #include <winrt/base.h>
 #include <winrt/windows.graphics.capture.h>
@@ -142,3 +144,218 @@ int __cdecl wgc_capture_bgra(void* hwnd_void, struct wgc_bgra_frame* out, int ti
         return WGC_ERR_START;
     }
 }
+
+// ---------------------------------------------------------------------------------------
+// Persistent capture sessions
+//
+// WinRT needs a multithreaded apartment, which the caller's thread (e.g. Qt's STA GUI
+// thread) can't always provide, so each session owns a thread that opens the capture,
+// serves grab requests one at a time and tears everything down on close.
+// ---------------------------------------------------------------------------------------
+
+struct wgc_session {
+    enum class Request { None, Grab, Close };
+
+    std::thread thread;
+    std::mutex call_mutex;              // one API call at a time
+    std::mutex mutex;                   // guards the request fields below
+    std::condition_variable cv;
+
+    Request request = Request::None;
+    bool done = false;
+    int rc = WGC_OK;
+    uint8_t* buffer = nullptr;
+    int32_t capacity = 0;
+    wgc_bgra_frame* out = nullptr;
+    int timeout_ms = 0;
+
+    // owned by the session thread
+    ComPtr<ID3D11Device> d3d;
+    ComPtr<ID3D11DeviceContext> ctx;
+    ComPtr<ID3D11Texture2D> staging;
+    WgcCapture cap;
+    bool has_frame = false;
+};
+
+static int copy_into_buffer(wgc_session* s, ID3D11Texture2D* src)
+{
+    D3D11_TEXTURE2D_DESC d{};
+    src->GetDesc(&d);
+    const int w = (int)d.Width;
+    const int h = (int)d.Height;
+    const int stride = w * 4;
+
+    s->out->data = s->buffer;
+    s->out->width = w;
+    s->out->height = h;
+    s->out->stride = stride;
+    s->out->size = stride * h;
+    if (!s->buffer || s->capacity < stride * h) return WGC_ERR_BUFFER;
+
+    // the staging texture is kept across grabs and only recreated when the size changes
+    D3D11_TEXTURE2D_DESC current{};
+    if (s->staging) s->staging->GetDesc(&current);
+    if (!s->staging || current.Width != d.Width || current.Height != d.Height) {
+        d.BindFlags = 0;
+        d.MiscFlags = 0;
+        d.Usage = D3D11_USAGE_STAGING;
+        d.CPUAccessFlags = D3D11_CPU_ACCESS_READ;
+        s->staging.Reset();
+        if (FAILED(s->d3d->CreateTexture2D(&d, nullptr, &s->staging))) return WGC_ERR_COPY;
+    }
+
+    s->ctx->CopyResource(s->staging.Get(), src);
+
+    D3D11_MAPPED_SUBRESOURCE m{};
+    if (FAILED(s->ctx->Map(s->staging.Get(), 0, D3D11_MAP_READ, 0, &m))) return WGC_ERR_COPY;
+
+    uint8_t* dst = s->buffer;
+    const uint8_t* srcp = (const uint8_t*)m.pData;
+    for (int y = 0; y < h; ++y) {
+        memcpy(dst, srcp, stride);
+        dst += stride;
+        srcp += m.RowPitch;
+    }
+
+    s->ctx->Unmap(s->staging.Get(), 0);
+    return WGC_OK;
+}
+
+static int session_grab_on_this_thread(wgc_session* s)
+{
+    // WGC only delivers frames when the window content changes: take the newest pending
+    // frame, wait for the first one, and otherwise return the last frame again
+    const ULONGLONG deadline = GetTickCount64() + (ULONGLONG)(s->timeout_ms > 0 ? s->timeout_ms : 2000);
+    for (;;) {
+        while (s->cap.GrabNextFrame()) s->has_frame = true;
+        if (s->has_frame || GetTickCount64() >= deadline) break;
+        ::Sleep(5);
+    }
+
+    ID3D11Texture2D* tex = s->cap.LatestTexture();
+    if (!s->has_frame || !tex) return WGC_ERR_TIMEOUT;
+    return copy_into_buffer(s, tex);
+}
+
+static void session_thread(wgc_session* s, HWND hwnd)
+{
+    using namespace winrt;
+
+    int rc = WGC_OK;
+    try {
+        init_apartment(apartment_type::multi_threaded);
+        if (FAILED(D3D11CreateDevice(nullptr, D3D_DRIVER_TYPE_HARDWARE, nullptr,
+            D3D11_CREATE_DEVICE_BGRA_SUPPORT, nullptr, 0,
+            D3D11_SDK_VERSION, &s->d3d, nullptr, &s->ctx))) {
+            rc = WGC_ERR_START;
+        }
+        else if (!s->cap.StartWinCap(s->d3d.Get(), hwnd, /*cursor*/false, /*borderless*/true)) {
+            rc = WGC_ERR_START;
+        }
+    }
+    catch (...) {
+        rc = WGC_ERR_START;
+    }
+
+    {
+        std::lock_guard<std::mutex> lock(s->mutex);
+        s->rc = rc;
+        s->done = true;
+    }
+    s->cv.notify_all();
+
+    while (rc == WGC_OK) {
+        std::unique_lock<std::mutex> lock(s->mutex);
+        s->cv.wait(lock, [s] { return s->request != wgc_session::Request::None; });
+        if (s->request == wgc_session::Request::Close) break;
+        lock.unlock();
+
+        int result;
+        try {
+            result = session_grab_on_this_thread(s);
+        }
+        catch (...) {
+            result = WGC_ERR_COPY;
+        }
+
+        lock.lock();
+        s->rc = result;
+        s->request = wgc_session::Request::None;
+        s->done = true;
+        lock.unlock();
+        s->cv.notify_all();
+    }
+
+    s->cap.Stop();
+    s->staging.Reset();
+    s->ctx.Reset();
+    s->d3d.Reset();
+}
+
+extern "C" __declspec(dllexport)
+int __cdecl wgc_session_open(void* hwnd_void, struct wgc_session** session)
+{
+    try {
+        if (!hwnd_void || !session) return WGC_ERR_INVALID_ARG;
+
+        wgc_session* s = new wgc_session();
+        s->thread = std::thread(session_thread, s, (HWND)hwnd_void);
+
+        int rc;
+        {
+            std::unique_lock<std::mutex> lock(s->mutex);
+            s->cv.wait(lock, [s] { return s->done; });
+            rc = s->rc;
+        }
+        if (rc != WGC_OK) {
+            s->thread.join();
+            delete s;
+            return rc;
+        }
+        *session = s;
+        return WGC_OK;
+    }
+    catch (...) {
+        return WGC_ERR_START;
+    }
+}
+
+extern "C" __declspec(dllexport)
+int __cdecl wgc_session_grab(struct wgc_session* s, uint8_t* buffer, int32_t capacity,
+                             struct wgc_bgra_frame* out, int timeout_ms)
+{
+    if (!s || !out) return WGC_ERR_INVALID_ARG;
+    try {
+        std::lock_guard<std::mutex> call(s->call_mutex);
+        std::unique_lock<std::mutex> lock(s->mutex);
+        s->buffer = buffer;
+        s->capacity = capacity;
+        s->out = out;
+        s->timeout_ms = timeout_ms;
+        s->done = false;
+        s->request = wgc_session::Request::Grab;
+        s->cv.notify_all();
+        s->cv.wait(lock, [s] { return s->done; });
+        return s->rc;
+    }
+    catch (...) {
+        return WGC_ERR_START;
+    }
+}
+
+extern "C" __declspec(dllexport)
+void __cdecl wgc_session_close(struct wgc_session* s)
+{
+    if (!s) return;
+    try {
+        std::lock_guard<std::mutex> call(s->call_mutex);
+        {
+            std::lock_guard<std::mutex> lock(s->mutex);
+            s->request = wgc_session::Request::Close;
+        }
+        s->cv.notify_all();
+        s->thread.join();
+    }
+    catch (...) {}
+    delete s;
+}
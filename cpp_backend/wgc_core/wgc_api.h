@@ -11,7 +11,8 @@ extern "C" {
         WGC_ERR_START = -2,
         WGC_ERR_TIMEOUT = -3,
         WGC_ERR_COPY = -4,
-        WGC_ERR_ENCODE = -5
+        WGC_ERR_ENCODE = -5,
+        WGC_ERR_BUFFER = -6     // caller's buffer too small; the frame's size is in out
     };
 
     struct wgc_bgra_frame {
@@ -25,6 +26,17 @@ extern "C" {
     __declspec(dllexport) int  __cdecl wgc_capture_bgra(void* hwnd, struct wgc_bgra_frame* out, int timeout_ms);
     __declspec(dllexport) void __cdecl wgc_free(void* p);
 
+    // Capture session kept open across grabs. wgc_session_grab copies the newest frame into
+    // the caller's buffer as tightly packed rows (stride = width * 4); when capacity is too
+    // small it returns WGC_ERR_BUFFER with the frame's size in out, and the next grab with a
+    // big enough buffer returns that frame without waiting.
+    struct wgc_session;
+
+    __declspec(dllexport) int  __cdecl wgc_session_open(void* hwnd, struct wgc_session** session);
+    __declspec(dllexport) int  __cdecl wgc_session_grab(struct wgc_session* session, uint8_t* buffer, int32_t capacity,
+                                                        struct wgc_bgra_frame* out, int timeout_ms);
+    __declspec(dllexport) void __cdecl wgc_session_close(struct wgc_session* session);
+
 #ifdef __cplusplus
 }
 #endif
@@ -1,7 +1,19 @@
 from PySide6.QtWidgets import QApplication, QMainWindow
 from ui.home import Monitor
+from utils.settings import data_dir, get_setting
+import logging
+import os
 import sys
 
+# the GUI has no console on Windows: log to a file in the app data, and to stderr when there is one
+handlers = [logging.FileHandler(os.path.join(data_dir(), "gamegrab.log"), encoding="utf-8")]
+if sys.stderr is not None:
+    handlers.append(logging.StreamHandler())
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+                    handlers=handlers)
+if get_setting("debug/log_stats"):
+    logging.getLogger("ui.home").setLevel(logging.DEBUG)
+
 app = QApplication(sys.argv)
 
 window = QMainWindow()
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from utils.buffers import BufferPool
+from utils.capture_session import BaseCaptureSession, FakeCaptureSession
+
+
+def frame(value, width=20, height=10):
+    return np.full((height, width, 4), value, dtype=np.uint8)
+
+
+def test_base_session_is_abstract():
+    with pytest.raises(TypeError):
+        BaseCaptureSession(1)
+
+
+def test_grab_requires_open_session():
+    session = FakeCaptureSession(1, [frame(1)], pool=BufferPool())
+    with pytest.raises(RuntimeError):
+        session.grab()
+
+
+def test_open_and_close_once():
+    session = FakeCaptureSession(1, [frame(1)], pool=BufferPool())
+    with session:
+        session.open()
+        assert session.is_open
+    session.close()
+    assert not session.is_open
+    assert (session.opened, session.closed) == (1, 1)
+
+
+def test_frames_are_written_into_pooled_buffers():
+    pool = BufferPool()
+    frames = [frame(1), frame(2), frame(3)]
+    with FakeCaptureSession(1, frames, pool=pool) as session:
+        grabbed = [session.grab() for _ in frames]
+    for source, buffer in zip(frames, grabbed):
+        assert buffer.shape == source.shape
+        assert not np.shares_memory(buffer, source)
+        np.testing.assert_array_equal(buffer, source)
+    assert session.grabs == 3
+
+
+def test_released_buffers_are_reused():
+    pool = BufferPool()
+    with FakeCaptureSession(1, [frame(1), frame(2)], pool=pool) as session:
+        first = session.grab()
+        address = first.ctypes.data
+        del first
+        second = session.grab()
+        assert second.ctypes.data == address
+        assert second[0, 0, 0] == 2
+    assert pool.stats()["reused"] >= 1
+
+
+def test_held_buffers_are_not_overwritten():
+    pool = BufferPool()
+    with FakeCaptureSession(1, [frame(1), frame(2)], pool=pool) as session:
+        first = session.grab()
+        view = first[2:5]
+        del first
+        second = session.grab()
+        assert not np.shares_memory(view, second)
+        assert (view == 1).all()
+        assert (second == 2).all()
+
+
+def test_resize_renegotiates_the_buffer():
+    pool = BufferPool()
+    with FakeCaptureSession(1, [frame(1), frame(2, width=8, height=5)], pool=pool) as session:
+        assert session.grab().shape == (10, 20, 4)
+        resized = session.grab()
+        assert resized.shape == (5, 8, 4)
+        assert (resized == 2).all()
+    # the first grab learns the size, the second adapts to the new one
+    assert session.resizes == 2
@@ -0,0 +1,76 @@
+import time
+import pytest
+from utils.windows import FakeWindowProvider, WindowProvider, WindowRegistry, normalize_title
+
+
+def registry(windows, keys=None):
+    provider = FakeWindowProvider(windows, keys)
+    return provider, WindowRegistry(provider)
+
+
+def test_provider_is_abstract():
+    with pytest.raises(TypeError):
+        WindowProvider()
+
+
+def test_refresh_adds_titled_windows():
+    provider, windows = registry({1: "Game", 2: "Launcher", 3: "  "})
+    assert windows.refresh() == ([1, 2], [], [])
+    assert windows.windows() == {1: "Game", 2: "Launcher"}
+    assert windows.version == 1
+
+
+def test_refresh_without_changes_keeps_version():
+    provider, windows = registry({1: "Game"})
+    windows.refresh()
+    assert windows.refresh() == ([], [], [])
+    assert windows.version == 1
+
+
+def test_add_rename_remove():
+    provider, windows = registry({1: "Game - 60 FPS", 2: "Launcher"})
+    windows.refresh()
+    provider.set_windows({1: "Game - 59 FPS", 4: "Browser"})
+    assert windows.refresh() == ([4], [2], [1])
+    assert windows.windows() == {1: "Game - 59 FPS", 4: "Browser"}
+    assert windows.title(1) == "Game - 59 FPS"
+    assert not windows.alive(2)
+    assert windows.version == 2
+
+
+def test_profile_key_survives_renames():
+    provider, windows = registry({1: "Game - 60 FPS"})
+    windows.refresh()
+    key = windows.profile_key(1)
+    provider.set_windows({1: "Dungeon B2 - 12 FPS"})
+    windows.refresh()
+    assert windows.profile_key(1) == key
+
+
+def test_profile_key_from_provider_and_dropped_with_window():
+    provider, windows = registry({1: "Game"}, keys={1: "game.exe|UnityWndClass"})
+    windows.refresh()
+    assert windows.profile_key(1) == "game.exe|UnityWndClass"
+    provider.set_windows({})
+    windows.refresh()
+    assert windows.profile_key(1) is None
+
+
+def test_normalize_title_drops_volatile_parts():
+    assert normalize_title("Game - 60 FPS") == normalize_title("Game - 144 FPS") == "game fps"
+    assert normalize_title("Map: Forest (12, 40)") == "map forest"
+
+
+def test_background_refresh():
+    provider, windows = registry({1: "Game"})
+    windows.refresh_interval = 0.01
+    windows.start()
+    try:
+        provider.set_windows({1: "Game", 2: "Browser"})
+        for _ in range(200):
+            if windows.alive(2):
+                break
+            time.sleep(0.01)
+        assert windows.alive(2)
+    finally:
+        windows.stop()
@@ -1,18 +1,39 @@
 from PySide6.QtWidgets import QWidget, QPushButton, QVBoxLayout, QComboBox, QMessageBox, QHBoxLayout, QLabel, QSizePolicy
 from PySide6.QtGui import QCloseEvent, QPixmap, QResizeEvent, QImage, QMovie
-from PySide6.QtCore import Qt, QThread
+from PySide6.QtCore import Qt, QThread, QTimer
 from utils.ocr import OCRWorker
 from utils import tools
+from utils.frame_source import WGCFrameSource, StreamingFrameSource
+from utils.frames import frame_to_qimage
+from utils.settings import get_setting
+from utils.metrics import format_timings
+from utils.memory import format_memory
 from functools import partial
 from PySide6.QtCore import Signal
 from .settings_dialog import SettingsDialog
+from .roi_label import RoiLabel
+from .overlay import TranslationOverlay
+from utils import roi_profiles
+from utils.windows import WindowRegistry, default_provider
+from utils.result_cache import LRUCache
+import logging
 import time
 
+# resizes are applied to the displayed frame once the window stopped changing size for this long
+RESIZE_DEBOUNCE_MS = 100
+# scaled frame pixmaps kept per display size (toggling maximized / restored reuses them)
+SCALED_PIXMAP_CACHE = 4
+
+log = logging.getLogger(__name__)
+
 class Monitor(QWidget):
     """
     Main GUI class
     """
-    start_OCR_signal = Signal(QImage)
+    start_OCR_signal = Signal()
+    settings_changed_signal = Signal()
+    set_rois_signal = Signal(object, list)
+    load_model_signal = Signal()
 
     def __init__(self):
         """
@@ -20,18 +41,42 @@ class Monitor(QWidget):
         """       
         super().__init__()
 
-        self.debug = True
         self.screenshot_taken = False
-        self.original_image = QImage()
-        self.ocr_image = QImage()
-
-        self.ocr_running = False
+        self.original_image = None      # last captured BGRA frame (NumPy), the OCR button's input
+        self.base_pixmap = None         # full-resolution pixmap of the frame on screen
+        self.base_key = None            # worker's frame key of base_pixmap, None for screenshots
+        self.scaled_pixmaps = LRUCache(SCALED_PIXMAP_CACHE)     # (width, height) -> scaled base_pixmap
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_DEBOUNCE_MS)
+        self.resize_timer.timeout.connect(self.rescale_pixmap)
+
+        self.model_ready = False
+        self._ocr_t0 = {}               # source -> time its queued OCR was requested
+        self.streams = {}               # source -> StreamingFrameSource of the live windows
+        self.live_timer = QTimer(self)
+        self.live_timer.timeout.connect(self.poll_live_frame)
+
+        # cached window handles, refreshed in the background; the combo box follows it
+        self.windows = WindowRegistry(default_provider())
+        self.windows.refresh()
+        self.windows.start()
+        self._windows_version = None
+        self.window_timer = QTimer(self)
+        self.window_timer.timeout.connect(self.sync_window_list)
+        self.window_timer.start(1000)
 
         self.createWorkers()
         self.screen_menu = self.createComboBox()
         self.main_layout = self.createLayouts()  
         self.setLayout(self.main_layout)
 
+        self.screen_menu.currentIndexChanged.connect(self.select_source)
+        self.select_source()
+
+        # load the OCR model on the worker thread once the event loop (and window) is up
+        QTimer.singleShot(0, self.load_model_signal.emit)
+
     def createWorkers(self):
         """
         Create persistent worker thread running OCR
@@ -41,22 +86,58 @@ class Monitor(QWidget):
 
         self.ocr_worker.moveToThread(self.ocr_thread)
 
-        self.start_OCR_signal.connect(self.ocr_worker.run_OCR)
+        # frames go through the scheduler; the signal only wakes the worker
+        self.scheduler = self.ocr_worker.scheduler
+        self.start_OCR_signal.connect(self.ocr_worker.process_pending)
+        self.settings_changed_signal.connect(self.ocr_worker.reload_settings)
+        self.set_rois_signal.connect(self.ocr_worker.set_rois)
+        self.load_model_signal.connect(self.ocr_worker.load_model)
+        self.ocr_worker.model_ready.connect(self.on_model_ready)
+        self.ocr_worker.model_failed.connect(self.on_model_failed)
         self.ocr_worker.result_ready.connect(self.process_OCR)
+        self.ocr_worker.stats_ready.connect(self.log_OCR_stats)
+        self.ocr_worker.metrics_ready.connect(self.show_timings)
+        self.ocr_worker.ocr_failed.connect(self.on_OCR_failed)
 
         self.ocr_thread.start()
 
     def createComboBox(self):
         """
-        Create dropdown menu to choose windows
+        Create dropdown menu to choose windows; items carry the window handle as their data
         """
         screen_menu = QComboBox()
-        screens = tools.screen_list()
-        for title in screens:
-            if title.strip(): 
-                screen_menu.addItem(title)
+        self._windows_version = self.windows.version
+        for hwnd, title in self.windows.windows().items():
+            screen_menu.addItem(title, hwnd)
         return screen_menu
-    
+
+    def sync_window_list(self):
+        """
+        Apply window registry changes to the combo box in place, keeping the selection
+        """
+        if self.windows.version == self._windows_version:
+            return
+        self._windows_version = self.windows.version
+        windows = self.windows.windows()
+        for index in reversed(range(self.screen_menu.count())):
+            hwnd = self.screen_menu.itemData(index)
+            if hwnd not in windows:
+                self.screen_menu.removeItem(index)
+            elif self.screen_menu.itemText(index) != windows[hwnd]:
+                self.screen_menu.setItemText(index, windows[hwnd])
+        listed = {self.screen_menu.itemData(index) for index in range(self.screen_menu.count())}
+        for hwnd, title in windows.items():
+            if hwnd not in listed:
+                self.screen_menu.addItem(title, hwnd)
+
+    def window_missing(self):
+        """
+        Tell the user the selected window is gone and refresh the list
+        """
+        QMessageBox.warning(self, "Warning", "Application Not Found or is Not in Borderless Window Mode!")
+        self.refresh_screens()
+        QMessageBox.information(self, "Window List Refreshed", "Please select an available application window.")
+
     
     def screen_grab(self):
         """
@@ -65,54 +146,144 @@ class Monitor(QWidget):
         # NOTE: user must run screengrab once to run ocr. inform user in readme or disable ocr_button until screen_grab runs once
         # NOTE: must inform user in readme.txt to use borderless mode
 
-        # enables ocr button
-        self.ocr_button.setEnabled(True)
+        # captures the selected window straight from its handle
+        hwnd = self.current_source()
+        if hwnd is None or not self.windows.alive(hwnd):
+            self.window_missing()
+            return
+
+        t0 = time.perf_counter()
+        try:
+            frame = tools.capture_hwnd_to_image(hwnd)
+        except RuntimeError:
+            frame = None
+        self.ocr_worker.metrics.record({"capture": time.perf_counter() - t0})
+        if frame is None:
+            # the previous frame (if any) stays the OCR button's input
+            QMessageBox.warning(self, "Warning", "Could Not Capture Window!")
+            return
+
+        # enables ocr button (once the model has loaded)
+        self.original_image = frame
+        self.screenshot_taken = True
+        self.update_ocr_button()
+
+        # process and display the image
+        self.display_image(frame_to_qimage(self.original_image))
+        self.overlay.clear()
+
+    def display_image(self, image, key=None):
+        """
+        Make image the frame on display. Only its pixmap is kept, so a pooled frame from the
+        worker is released as soon as it is converted; scaled copies are made per display size
+        """
+        self.base_pixmap = QPixmap.fromImage(image)
+        self.base_key = key
+        self.scaled_pixmaps.clear()
+        self.rescale_pixmap()
 
-        # finds and captures a screenshot of a window
-        screens = tools.screen_list()
-        selected_title = self.screen_menu.currentText()
+    def current_source(self):
+        """
+        Handle of the selected window, None when the list is empty
+        """
+        return self.screen_menu.currentData()
 
+    def select_source(self):
+        """
+        The selected window gets OCR priority, its ROIs and the live button state
+        """
+        source = self.current_source()
+        self.scheduler.set_focus(source)
+        # the overlay belongs to the previous window's frame
+        self.base_key = None
+        self.overlay.clear()
+        self.load_rois()
+        self.live_button.blockSignals(True)
+        self.live_button.setChecked(source in self.streams)
+        self.live_button.blockSignals(False)
+
+    def toggle_live(self, checked):
+        """
+        Start or stop continuous capture of the selected window; several windows can be live at once
+        """
+        source = self.current_source()
+        if not checked:
+            self.stop_live(source)
+            return
 
-        if selected_title not in screens:
-            QMessageBox.warning(self, "Warning", "Application Not Found or is Not in Borderless Window Mode!")
-            self.screen_menu.clear()
-            for title in screens:               # refreshes screen list when application not found
-                if title.strip():
-                    self.screen_menu.addItem(title)
-            QMessageBox.information(self, "Window List Refreshed", "Please select an available application window.")
+        if source is None or not self.windows.alive(source):
+            self.live_button.setChecked(False)
+            self.window_missing()
             return
 
-        self.original_image = tools.capture_screen(selected_title)
-        if self.original_image is None:
-            QMessageBox.warning(self, "Warning", "Could Not Capture Window!")
-            return    
-        
-        # process and display the image
-        pixmap = QPixmap.fromImage(self.original_image)
-        scaled_pixmap = pixmap.scaled(
-            self.display_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-        self.display_label.setPixmap(scaled_pixmap)
-        self.display_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        fps = get_setting("capture/fps")
+        stream = StreamingFrameSource(WGCFrameSource(source), fps=fps)
+        stream.start()
+        self.streams[source] = stream
+        if not self.live_timer.isActive():
+            self.live_timer.start(int(1000 / fps))
+
+    def stop_live(self, source=None):
+        """
+        Stop live capture of source (default: every live window) and cancel its queued OCR
+        """
+        for stopped in [source] if source is not None else list(self.streams):
+            stream = self.streams.pop(stopped, None)
+            if stream is not None:
+                stream.stop()
+            self.scheduler.cancel(stopped)
+        if not self.streams:
+            self.live_timer.stop()
+        if self.current_source() not in self.streams and self.live_button.isChecked():
+            self.live_button.setChecked(False)
+
+    def poll_live_frame(self):
+        """
+        Queue the newest streamed frame of every live window for OCR; a window's frame still
+        waiting in the queue is replaced, so a busy worker only ever sees fresh frames
+        """
+        for source, stream in list(self.streams.items()):
+            if not stream.is_running() and stream.error is not None:
+                title = self.windows.title(source) or "window"
+                QMessageBox.warning(self, "Warning", f"Live capture of {title} stopped: {stream.error}")
+                self.stop_live(source)
+                continue
+
+            frame = stream.latest()
+            if frame is None:
+                continue
+            self.ocr_worker.metrics.record({"capture": stream.grab_seconds})
+            if source == self.current_source():
+                self.original_image = frame
+                self.screenshot_taken = True
+            if self.model_ready:
+                self.submit_OCR(source, frame, live=True)
         
     def rescale_pixmap(self):
-        if self.original_image.isNull():
+        """
+        Show the base frame scaled to the label, smooth-scaling it only once per display size
+        """
+        if self.base_pixmap is None:
             return
         target = self.display_label.contentsRect().size()  # new layouted size
         if target.width() <= 0 or target.height() <= 0:
             return
-        pm = QPixmap.fromImage(self.original_image)
-        self.display_label.setPixmap(pm.scaled(
-            target,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        ))
+        key = (target.width(), target.height())
+        scaled = self.scaled_pixmaps.get(key)
+        if scaled is None:
+            scaled = self.base_pixmap.scaled(
+                target,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation
+            )
+            self.scaled_pixmaps.put(key, scaled)
+        self.display_label.setPixmap(scaled)
+        self.overlay.update()
 
     def resizeEvent(self, event: QResizeEvent):
         super().resizeEvent(event)
-        self.rescale_pixmap()
+        # rescale once the resize settles instead of on every intermediate size
+        self.resize_timer.start()
 
     def closeEvent(self, event: QCloseEvent) -> None:
         """
@@ -121,6 +292,10 @@ class Monitor(QWidget):
         # IMPORTANT: user must run screengrab once to run ocr. inform user in readme or disable ocr_button until screen_grab runs once
         # IMPORTANT: must inform user in readme.txt to use borderless mode
         """
+        self.stop_live()
+        self.window_timer.stop()
+        self.windows.stop()
+        self.ocr_worker.shutdown()
         self.ocr_thread.quit()
         self.ocr_thread.wait()
         self.ocr_worker.deleteLater()
@@ -140,6 +315,11 @@ class Monitor(QWidget):
         take_screenshot_button.setText("Screen grab")
         take_screenshot_button.clicked.connect(self.screen_grab)
 
+        self.live_button = QPushButton("Live")
+        self.live_button.setCheckable(True)
+        self.live_button.setToolTip("Continuously capture and OCR the selected window")
+        self.live_button.toggled.connect(self.toggle_live)
+
         refresh_button = QPushButton()
         refresh_button.setText("Refresh")
         refresh_button.clicked.connect(self.refresh_screens)
@@ -149,7 +329,16 @@ class Monitor(QWidget):
 
         self.ocr_button.clicked.connect(partial(self.run_OCR_button_clicked, self.ocr_button))
         self.ocr_button.setEnabled(False)
-        self.ocr_button.setToolTip("Capture a screen first to enable OCR!")
+        self.ocr_button.setToolTip("Loading OCR model...")
+
+        self.roi_button = QPushButton("Select ROI")
+        self.roi_button.setCheckable(True)
+        self.roi_button.setToolTip("Drag over the image to restrict OCR to that region of this window")
+        self.roi_button.toggled.connect(self.toggle_roi_selection)
+
+        clear_roi_button = QPushButton("Clear ROI")
+        clear_roi_button.setToolTip("OCR the whole window again")
+        clear_roi_button.clicked.connect(self.clear_rois)
 
         self.settings_button = QPushButton("Settings")
         self.settings_button.clicked.connect(self.open_settings)
@@ -157,15 +346,20 @@ class Monitor(QWidget):
         button_layout = QHBoxLayout()
         button_layout.addWidget(self.screen_menu, stretch=2)
         button_layout.addWidget(take_screenshot_button, stretch=2)
+        button_layout.addWidget(self.live_button, stretch=1)
         button_layout.addWidget(refresh_button, stretch=1)
         button_layout.addWidget(self.ocr_button, stretch=1)
+        button_layout.addWidget(self.roi_button, stretch=1)
+        button_layout.addWidget(clear_roi_button, stretch=0)
         button_layout.addWidget(self.settings_button, stretch=0)
 
-        self.display_label = QLabel()
+        self.display_label = RoiLabel()
+        self.display_label.roi_selected.connect(self.add_roi)
         self.display_label.setMinimumSize(1, 1)
         self.display_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.display_label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
         self.display_label.setStyleSheet("background-color: #2E2E2E;")
+        self.overlay = TranslationOverlay(self.display_label)
 
         # load custom image
         """
@@ -187,55 +381,156 @@ class Monitor(QWidget):
         main_layout.addLayout(button_layout)
         main_layout.addWidget(self.display_label, stretch=1)
 
+        self.timing_label = QLabel()
+        self.timing_label.setVisible(get_setting("debug/show_timings"))
+        main_layout.addWidget(self.timing_label)
+
         return main_layout
     
+    def load_rois(self):
+        """
+        Show the saved regions of interest of the selected window and hand them to the worker
+        """
+        # profiles are saved per application (handles don't survive a restart, titles change);
+        # the worker gets them per handle, so a retitled window keeps its regions
+        key = self.profile_key()
+        if key is not None:
+            roi_profiles.migrate(self.screen_menu.currentText(), key)
+        rois = [] if key is None else roi_profiles.get_rois(key)
+        self.display_label.set_rois(rois)
+        self.set_rois_signal.emit(self.current_source(), rois)
+
+    def profile_key(self):
+        """
+        Profile key of the selected window, None without a selection
+        """
+        hwnd = self.current_source()
+        return None if hwnd is None else self.windows.profile_key(hwnd)
+
+    def toggle_roi_selection(self, checked):
+        self.display_label.set_selecting(checked)
+
+    def add_roi(self, roi):
+        key = self.profile_key()
+        if key is None:
+            return
+        roi_profiles.add_roi(key, roi)
+        self.load_rois()
+
+    def clear_rois(self):
+        key = self.profile_key()
+        if key is not None:
+            roi_profiles.clear_rois(key)
+        self.load_rois()
+
     def open_settings(self):
         dlg = SettingsDialog(self)
         dlg.exec()
+        self.settings_changed_signal.emit()
         
     def refresh_screens(self):
         """
         Refresh and display newly detected windows
         """
-        screens = tools.screen_list()
-        self.screen_menu.clear()
-        for title in screens:
-            if title.strip():
-                self.screen_menu.addItem(title)
+        self.windows.refresh()
+        self.sync_window_list()
 
-    def run_OCR_button_clicked(self, button):
+    def on_model_ready(self):
+        self.model_ready = True
+        self.update_ocr_button()
+
+    def on_model_failed(self, message):
+        self.ocr_button.setToolTip("OCR model failed to load")
+        QMessageBox.critical(self, "Error", f"Could not load the OCR model: {message}")
+
+    def update_ocr_button(self):
         """
-        Run OCR
+        OCR needs both a loaded model and a captured frame
         """
-        button.setEnabled(False)                # prevent multiple concurrent triggers
-        self.ocr_running = True
-        #self._ocr_t0 = time.perf_counter() 
-        self.start_OCR_signal.emit(self.original_image)
+        self.ocr_button.setEnabled(self.model_ready and self.screenshot_taken)
+        if not self.model_ready:
+            self.ocr_button.setToolTip("Loading OCR model...")
+        elif not self.screenshot_taken:
+            self.ocr_button.setToolTip("Capture a screen first to enable OCR!")
+        else:
+            self.ocr_button.setToolTip("")
 
-    def process_OCR(self, out_image):
+    def run_OCR_button_clicked(self, button):
         """
-        Process OCR after receiving the results of OCRWorker
+        Run OCR; clicks while the worker is busy replace the queued frame instead of piling up
         """
-        self.ocr_running = False
+        self.submit_OCR(self.current_source(), self.original_image)
 
-        # reenable ocr button
-        self.ocr_button.setEnabled(True)
+    def submit_OCR(self, source, frame, live=False):
+        if frame is None:
+            return
+        self._ocr_t0.setdefault(source, time.perf_counter())
+        if self.scheduler.submit(source, frame, live):
+            self.start_OCR_signal.emit()
 
-        self.ocr_image = out_image
-        # TODO: add bounding box labels to image regions
-        #self.display_label.setPixmap(QPixmap.fromImage(self.ocr_image))
+    def on_OCR_failed(self, sources, message):
+        """
+        Forget the request times of frames whose OCR failed (the worker logged the error)
+        """
+        for source in sources:
+            self._ocr_t0.pop(source, None)
 
-        pixmap = QPixmap.fromImage(self.ocr_image)
-        scaled_pixmap = pixmap.scaled(
-            self.display_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
-        self.display_label.setPixmap(scaled_pixmap)
-        self.display_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+    def log_OCR_stats(self, stats):
+        """
+        Log incremental OCR and result cache statistics at debug level (debug/log_stats)
+        """
+        if not log.isEnabledFor(logging.DEBUG):
+            return
+        if "tiles_total" in stats:
+            log.debug("OCR reused %d/%d tiles, %d boxes, re-read %d regions",
+                      stats["tiles_reused"], stats["tiles_total"], stats["boxes_reused"], stats["regions"])
+        if "frame_cache" in stats:
+            log.debug("OCR cache hit rate: frames %.0f%%, crops %.0f%%",
+                      stats["frame_cache"]["hit_rate"] * 100, stats["crop_cache"]["hit_rate"] * 100)
+        if stats.get("layout"):
+            layout = stats["layout"]
+            log.debug("Grouped %d boxes into %d segments (%d furigana dropped)",
+                      layout["segments_in"], layout["segments_out"], layout["furigana"])
+        if "tracker" in stats:
+            tracker = stats["tracker"]
+            log.debug("Tracking %d lines (%d stable), translations reused %d, requested %d",
+                      tracker["tracks"], tracker["stable"], tracker["translations_reused"],
+                      tracker["translations_requested"])
+        if "copies" in stats:
+            log.debug("Copied %.1f MB for a %.1f MB frame",
+                      stats["copies"]["copied"] / 1e6, stats["copies"]["frame"] / 1e6)
+        if "memory" in stats:
+            log.debug("Memory: %s, frame pool %.0f MiB",
+                      format_memory(stats["memory"]), stats["memory"]["pool"] / 2**20)
+
+    def show_timings(self, timings):
+        """
+        Per-stage timing readout, on screen when enabled in settings and logged at debug level
+        """
+        show = get_setting("debug/show_timings")
+        self.timing_label.setVisible(show)
+        if not show and not log.isEnabledFor(logging.DEBUG):
+            return
+        readout = format_timings(timings)
+        if show:
+            self.timing_label.setText(readout)
+        log.debug("%s", readout)
 
-        elapsed_ms = None
-        if self._ocr_t0 is not None:
-            elapsed_ms = (time.perf_counter() - self._ocr_t0) * 1000.0
-            self._ocr_t0 = None
-            #print(f"OCR took {elapsed_ms:.1f} ms")
\ No newline at end of file
+    def process_OCR(self, source, key, frame, items):
+        """
+        Process OCR after receiving the results of OCRWorker; only the selected window is shown.
+        A new frame replaces the base pixmap, otherwise only the overlay is repainted
+        """
+        # end-to-end time from request to first painted result
+        t0 = self._ocr_t0.pop(source, None)
+        if t0 is not None:
+            self.ocr_worker.metrics.record({"total": time.perf_counter() - t0})
+
+        if source != self.current_source():
+            return
+        if frame is not None and key != self.base_key:
+            self.display_image(frame_to_qimage(frame), key)
+        elif key != self.base_key:
+            # translations for a frame that is no longer on screen
+            return
+        self.overlay.set_items(items, (self.base_pixmap.width(), self.base_pixmap.height()))
\ No newline at end of file
@@ -0,0 +1,69 @@
+from PySide6.QtWidgets import QWidget
+from PySide6.QtGui import QPainter, QColor, QFontDatabase
+from PySide6.QtCore import Qt, QRect, QEvent
+from utils.text_layout import FontFitter
+from utils.overlay import STYLE_TRANSLATED, STYLE_SOURCE
+
+# (box fill, text colour) per overlay item style
+STYLE_COLORS = {
+    STYLE_TRANSLATED: (QColor(0, 0, 0, 200), QColor(255, 255, 255)),
+    STYLE_SOURCE: (QColor(0, 0, 0, 200), QColor(190, 190, 190)),
+}
+
+
+class TranslationOverlay(QWidget):
+    """
+    Transparent layer over the image label painting the OCR overlay items, scaled to where
+    the label shows the frame. New translations and resizes repaint this layer only; the
+    frame underneath stays the label's cached pixmap.
+    """
+    def __init__(self, label):
+        super().__init__(label)
+        self.label = label
+        self.items = []
+        self.frame_size = None
+        family = "Noto Sans JP" if "Noto Sans JP" in QFontDatabase.families() else "Meiryo"
+        self.font_fitter = FontFitter(family)
+        # mouse input (ROI selection) goes to the label
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setGeometry(label.rect())
+        label.installEventFilter(self)
+
+    def set_items(self, items, frame_size):
+        """
+        Show items; frame_size is the (width, height) their rects refer to
+        """
+        self.items = items
+        self.frame_size = frame_size
+        self.update()
+
+    def clear(self):
+        self.set_items([], None)
+
+    def eventFilter(self, watched, event):
+        if watched is self.label and event.type() == QEvent.Type.Resize:
+            self.setGeometry(self.label.rect())
+        return False
+
+    def paintEvent(self, event):
+        area = self.label.pixmap_rect()
+        if not self.items or self.frame_size is None or area.isEmpty():
+            return
+        sx = area.width() / self.frame_size[0]
+        sy = area.height() / self.frame_size[1]
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
+        for item in self.items:
+            x, y, w, h = item.rect
+            rect = QRect(area.left() + int(x * sx), area.top() + int(y * sy),
+                         max(1, int(w * sx)), max(1, int(h * sy)))
+            fill, color = STYLE_COLORS[item.style]
+            painter.fillRect(rect, fill)
+
+            # largest font size that fits the box at the displayed scale
+            painter.setFont(self.font_fitter.fitted_font(item.text, rect.width(), rect.height()))
+            painter.setPen(color)
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, item.text)
+        painter.end()
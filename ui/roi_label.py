@@ -0,0 +1,82 @@
+from PySide6.QtWidgets import QLabel, QRubberBand
+from PySide6.QtGui import QPainter, QPen, QColor, QMouseEvent
+from PySide6.QtCore import Qt, QRect, QPoint, QSize, Signal
+
+
+class RoiLabel(QLabel):
+    """
+    Image display that draws the current regions of interest and, in selection mode,
+    lets the user drag out a new one
+
+    Emits:
+        roi_selected (tuple): (x0, y0, x1, y1) of the dragged region as fractions of the image.
+    """
+    roi_selected = Signal(tuple)
+
+    def __init__(self):
+        super().__init__()
+        self.selecting = False
+        self.rois = []
+        self._origin = None
+        self._band = QRubberBand(QRubberBand.Shape.Rectangle, self)
+
+    def set_selecting(self, selecting):
+        self.selecting = selecting
+        self.setCursor(Qt.CursorShape.CrossCursor if selecting else Qt.CursorShape.ArrowCursor)
+
+    def set_rois(self, rois):
+        self.rois = list(rois)
+        self.update()
+
+    def pixmap_rect(self):
+        """
+        Where the (centered, aspect-scaled) pixmap sits inside the label
+        """
+        pixmap = self.pixmap()
+        if pixmap is None or pixmap.isNull():
+            return QRect()
+        size = pixmap.deviceIndependentSize().toSize()
+        origin = QPoint((self.width() - size.width()) // 2, (self.height() - size.height()) // 2)
+        return QRect(origin, size)
+
+    def mousePressEvent(self, event: QMouseEvent):
+        if not self.selecting or event.button() != Qt.MouseButton.LeftButton:
+            return super().mousePressEvent(event)
+        self._origin = event.position().toPoint()
+        self._band.setGeometry(QRect(self._origin, QSize()))
+        self._band.show()
+
+    def mouseMoveEvent(self, event: QMouseEvent):
+        if self._origin is None:
+            return super().mouseMoveEvent(event)
+        self._band.setGeometry(QRect(self._origin, event.position().toPoint()).normalized())
+
+    def mouseReleaseEvent(self, event: QMouseEvent):
+        if self._origin is None:
+            return super().mouseReleaseEvent(event)
+        self._band.hide()
+        self._origin = None
+
+        area = self.pixmap_rect()
+        selected = self._band.geometry().intersected(area)
+        if area.isEmpty() or selected.width() < 4 or selected.height() < 4:
+            return
+        self.roi_selected.emit((
+            (selected.left() - area.left()) / area.width(),
+            (selected.top() - area.top()) / area.height(),
+            (selected.right() + 1 - area.left()) / area.width(),
+            (selected.bottom() + 1 - area.top()) / area.height(),
+        ))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        area = self.pixmap_rect()
+        if not self.rois or area.isEmpty():
+            return
+        painter = QPainter(self)
+        painter.setPen(QPen(QColor(0, 200, 255), 2, Qt.PenStyle.DashLine))
+        for x0, y0, x1, y1 in self.rois:
+            painter.drawRect(QRect(
+                area.left() + int(x0 * area.width()), area.top() + int(y0 * area.height()),
+                int((x1 - x0) * area.width()), int((y1 - y0) * area.height())))
+        painter.end()
@@ -1,10 +1,11 @@
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
-    QPushButton, QComboBox, QMessageBox, QWidget
+    QPushButton, QComboBox, QMessageBox, QWidget, QCheckBox
 )
 from functools import partial
 from PySide6.QtCore import Qt
 from utils.key_ring import get_api_key, set_api_key, delete_api_key
+from utils.settings import get_setting, set_setting
 
 class SettingsDialog(QDialog):
     def __init__(self, parent: QWidget | None = None):
@@ -21,6 +22,77 @@ class SettingsDialog(QDialog):
         self.key_edit = QLineEdit()
         self.key_edit.setEchoMode(QLineEdit.EchoMode.Password)
         self.key_edit.setPlaceholderText("Enter API key for selected provider")
+
+        self.translate_with_box = QComboBox()
+        self.translate_with_box.addItems(["DeepL", "Azure", "Google", "Offline", "Auto"])
+        self.translate_with_box.setToolTip("Auto sends each batch to the fastest provider with a key and quota left")
+        self.translate_with_box.setCurrentText(get_setting("translation/provider"))
+        self.translate_with_box.currentTextChanged.connect(partial(set_setting, "translation/provider"))
+
+        self.region_edit = QLineEdit(get_setting("translation/azure_region"))
+        self.region_edit.setPlaceholderText("Azure resource region (empty for global)")
+        self.region_edit.editingFinished.connect(
+            lambda: set_setting("translation/azure_region", self.region_edit.text().strip()))
+
+        self.backend_box = QComboBox()
+        self.backend_box.addItems(["torch", "onnx"])
+        self.backend_box.setToolTip("onnx runs the OCR models in ONNX Runtime (needs onnxruntime); applies on next start")
+        self.backend_box.setCurrentText(get_setting("ocr/backend"))
+        self.backend_box.currentTextChanged.connect(partial(set_setting, "ocr/backend"))
+
+        self.languages_edit = QLineEdit(get_setting("ocr/languages"))
+        self.languages_edit.setPlaceholderText("ja,en")
+        self.languages_edit.setToolTip("Comma separated EasyOCR languages; \"en\" alone loads a smaller, faster model")
+        self.languages_edit.editingFinished.connect(
+            lambda: set_setting("ocr/languages", self.languages_edit.text().strip() or "ja,en"))
+
+        self.quantize_box = QCheckBox("Quantized (int8) OCR models on CPU (applies on next start)")
+        self.quantize_box.setChecked(get_setting("ocr/quantize"))
+        self.quantize_box.toggled.connect(partial(set_setting, "ocr/quantize"))
+
+        self.dual_pass_box = QCheckBox("Dual-pass OCR (full colour + grey runs, slower)")
+        self.dual_pass_box.setChecked(get_setting("ocr/dual_pass"))
+        self.dual_pass_box.toggled.connect(partial(set_setting, "ocr/dual_pass"))
+
+        self.incremental_box = QCheckBox("Incremental OCR (only re-read changed parts of the window)")
+        self.incremental_box.setChecked(get_setting("ocr/incremental"))
+        self.incremental_box.toggled.connect(partial(set_setting, "ocr/incremental"))
+
+        self.adaptive_box = QCheckBox("Adaptive resolution (detect text on a downscaled frame)")
+        self.adaptive_box.setChecked(get_setting("ocr/adaptive_resolution"))
+        self.adaptive_box.toggled.connect(partial(set_setting, "ocr/adaptive_resolution"))
+
+        self.batch_box = QCheckBox("Batch OCR of several live windows into one recognizer call")
+        self.batch_box.setChecked(get_setting("ocr/batch_sources"))
+        self.batch_box.toggled.connect(partial(set_setting, "ocr/batch_sources"))
+
+        self.gpu_preprocess_box = QCheckBox("Preprocess frames on the GPU when available (applies on next start)")
+        self.gpu_preprocess_box.setChecked(get_setting("ocr/gpu_preprocess"))
+        self.gpu_preprocess_box.toggled.connect(partial(set_setting, "ocr/gpu_preprocess"))
+
+        self.paragraphs_box = QCheckBox("Group text into paragraphs and translate each as one segment")
+        self.paragraphs_box.setChecked(get_setting("ocr/group_paragraphs"))
+        self.paragraphs_box.toggled.connect(partial(set_setting, "ocr/group_paragraphs"))
+
+        self.tracking_box = QCheckBox("Track text across live frames (translate lines once they stop changing)")
+        self.tracking_box.setChecked(get_setting("ocr/tracking"))
+        self.tracking_box.toggled.connect(partial(set_setting, "ocr/tracking"))
+
+        self.record_box = QCheckBox("Record the session (frames, OCR results, translations) for search and replay")
+        self.record_box.setChecked(get_setting("session/record"))
+        self.record_box.toggled.connect(partial(set_setting, "session/record"))
+
+        self.warmup_box = QCheckBox("Warm up the OCR model after loading (applies on next start)")
+        self.warmup_box.setChecked(get_setting("ocr/warmup"))
+        self.warmup_box.toggled.connect(partial(set_setting, "ocr/warmup"))
+
+        self.timings_box = QCheckBox("Show per-stage timings under the image")
+        self.timings_box.setChecked(get_setting("debug/show_timings"))
+        self.timings_box.toggled.connect(partial(set_setting, "debug/show_timings"))
+
+        self.log_stats_box = QCheckBox("Log per-frame OCR statistics and timings (applies on next start)")
+        self.log_stats_box.setChecked(get_setting("debug/log_stats"))
+        self.log_stats_box.toggled.connect(partial(set_setting, "debug/log_stats"))
         
         self.create_buttons_and_layouts()
 
@@ -86,11 +158,37 @@ class SettingsDialog(QDialog):
         row3.addWidget(delete_button)
         row3.addWidget(close_button)
 
+        translate_row = QHBoxLayout()
+        translate_row.addWidget(QLabel("Translate with:"))
+        translate_row.addWidget(self.translate_with_box, 1)
+        translate_row.addWidget(QLabel("Azure region:"))
+        translate_row.addWidget(self.region_edit, 1)
+
+        model_row = QHBoxLayout()
+        model_row.addWidget(QLabel("OCR backend:"))
+        model_row.addWidget(self.backend_box, 1)
+        model_row.addWidget(QLabel("Languages:"))
+        model_row.addWidget(self.languages_edit, 1)
+
         top.addLayout(row1)
         top.addLayout(row2)
+        top.addLayout(translate_row)
+        top.addLayout(model_row)
+        top.addWidget(self.quantize_box)
+        top.addWidget(self.dual_pass_box)
+        top.addWidget(self.incremental_box)
+        top.addWidget(self.adaptive_box)
+        top.addWidget(self.batch_box)
+        top.addWidget(self.gpu_preprocess_box)
+        top.addWidget(self.paragraphs_box)
+        top.addWidget(self.tracking_box)
+        top.addWidget(self.record_box)
+        top.addWidget(self.warmup_box)
+        top.addWidget(self.timings_box)
+        top.addWidget(self.log_stats_box)
         top.addLayout(row3)
         self.setLayout(top)
-        self.resize(520, 140)
+        self.resize(520, 470)
 
     def current_provider(self):
         return self.provider_box.currentText()
@@ -0,0 +1,190 @@
+"""
+Headless batch OCR over screenshots and recorded gameplay
+
+    python -m utils.batch_ocr screenshots/ capture.mp4 -o results.jsonl --workers 4 --translate
+
+Images and directories of images are OCR'd whole; videos are sampled every --video-step
+frames. Work fans out over a process pool with one EasyOCR model per process, results
+are written as one JSON line per frame in input order.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from .frame_source import ReplayFrameSource, image_files, read_image
+from .ocr_engine import BACKENDS, BACKEND_TORCH
+
+# per-process state, set up by _init_worker
+_engine = None
+
+
+def _init_worker(languages, gpu, threads, dual_pass, detect_long_side, backend, quantize):
+    """
+    Pin the CPU thread pools and load one model for this worker process
+    """
+    global _engine
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(threads)
+    # torch / easyocr are imported here so the thread settings above apply to them
+    from .ocr_engine import OCREngine
+    _engine = OCREngine(languages, gpu=gpu, dual_pass=dual_pass,
+                        adaptive=detect_long_side > 0, detect_long_side=detect_long_side,
+                        backend=backend, quantize=quantize, threads=threads)
+
+
+def _ocr_job(job):
+    """
+    OCR one frame: job is (source, frame_index, path or BGRA array)
+    """
+    source, frame_index, image = job
+    if isinstance(image, str):
+        image = read_image(image)
+    results = _engine.ocr_image(cv2.cvtColor(image, cv2.COLOR_BGRA2BGR))
+    return source, frame_index, [([[int(x), int(y)] for x, y in box], text, float(conf))
+                                 for box, text, conf in results]
+
+
+def iter_jobs(paths, video_step):
+    """
+    Expand files, directories and videos into (source, frame_index, image) jobs.
+    Image files are passed by path and decoded in the worker; video frames are decoded here.
+    """
+    for path in paths:
+        files = image_files(path)
+        if files is not None:
+            for file_path in files:
+                yield file_path, 0, file_path
+            continue
+        source = ReplayFrameSource(path, step=video_step)
+        try:
+            while True:
+                frame = source.grab()
+                if frame is None:
+                    break
+                yield path, source.frame_index, frame
+        finally:
+            source.close()
+
+
+def bounded_map(pool, fn, jobs, limit):
+    """
+    Like pool.map, in order, but with at most limit jobs in flight so long videos
+    aren't decoded into memory all at once
+    """
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(fn, job))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def group_results(result, segments):
+    """
+    (source, frame_index, results) with the results grouped into paragraphs;
+    segments accumulates [boxes before, segments after]
+    """
+    from .layout import group_paragraphs
+    source, frame_index, results = result
+    paragraphs, _ = group_paragraphs([(box, text, conf, None) for box, text, conf in results])
+    segments[0] += len(results)
+    segments[1] += len(paragraphs)
+    return source, frame_index, [(box, text, conf) for box, text, conf, _ in paragraphs]
+
+
+def translate_results(batch, translator, target_lang):
+    """
+    Translate the unique texts of a batch of (source, frame_index, results) in one call
+    """
+    texts = list(dict.fromkeys(text for _, _, results in batch for _, text, _ in results))
+    return dict(zip(texts, translator.translate_many(texts, target_lang=target_lang)))
+
+
+def write_batch(out, batch, translations):
+    for source, frame_index, results in batch:
+        record = {
+            "source": source,
+            "frame": frame_index,
+            "results": [{"box": box, "text": text, "conf": conf,
+                         "translation": translations.get(text) if translations is not None else None}
+                        for box, text, conf in results],
+        }
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def parse_args(argv=None):
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Batch OCR (and translate) images and videos")
+    parser.add_argument("inputs", nargs="+", help="image files, directories of images or video files")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output path (default stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPUs / threads, 1 with --gpu)")
+    parser.add_argument("--threads", type=int, default=2, help="CPU threads per worker")
+    parser.add_argument("--gpu", action="store_true", help="run the model on CUDA")
+    parser.add_argument("--languages", default="ja,en", help="comma separated EasyOCR languages")
+    parser.add_argument("--backend", choices=BACKENDS, default=BACKEND_TORCH,
+                        help="inference backend (onnx needs the onnxruntime package)")
+    parser.add_argument("--no-quantize", dest="quantize", action="store_false",
+                        help="run the fp32 models on CPU instead of int8 weights")
+    parser.add_argument("--dual-pass", action="store_true", help="full OCR on colour and grey frames")
+    parser.add_argument("--detect-long-side", type=int, default=0,
+                        help="detect on frames downscaled to this long side, then adapt to the text size (0: full resolution)")
+    parser.add_argument("--paragraphs", action="store_true",
+                        help="group boxes into paragraphs and translate each paragraph as one segment")
+    parser.add_argument("--video-step", type=int, default=30, help="OCR every Nth video frame")
+    parser.add_argument("--translate", action="store_true", help="translate with the configured provider")
+    parser.add_argument("--target-lang", default="EN-US")
+    args = parser.parse_args(argv)
+    if args.workers is None:
+        args.workers = 1 if args.gpu else max(1, cpus // args.threads)
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    translator = None
+    if args.translate:
+        from .translator import create_translator
+        translator = create_translator()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    languages = tuple(args.languages.split(","))
+    frames = 0
+    segments = [0, 0]
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                                 initargs=(languages, args.gpu, args.threads, args.dual_pass,
+                                           args.detect_long_side, args.backend, args.quantize)) as pool:
+            batch = []
+            jobs = iter_jobs(args.inputs, args.video_step)
+            for result in bounded_map(pool, _ocr_job, jobs, args.workers * 4):
+                if args.paragraphs:
+                    result = group_results(result, segments)
+                batch.append(result)
+                frames += 1
+                if len(batch) >= 32:
+                    write_batch(out, batch, translate_results(batch, translator, args.target_lang) if translator else None)
+                    batch = []
+                    print(f"{frames} frames, {frames / (time.perf_counter() - start):.2f} frames/s", file=sys.stderr)
+            if batch:
+                write_batch(out, batch, translate_results(batch, translator, args.target_lang) if translator else None)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"OCR'd {frames} frames in {elapsed:.1f}s ({frames / elapsed if elapsed else 0:.2f} frames/s) "
+          f"with {args.workers} workers x {args.threads} threads", file=sys.stderr)
+    if args.paragraphs and frames:
+        print(f"{segments[0] / frames:.1f} segments per frame before grouping, "
+              f"{segments[1] / frames:.1f} after", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import numpy as np
+
+# candidates below this confidence are dropped before merging
+CONF_FLOOR = 0.4
+# boxes overlapping more than this are treated as the same text region
+IOU_THRESHOLD = 0.5
+
+
+def quads_to_rects(boxes):
+    """
+    Convert EasyOCR quads (4 [x, y] points each) into an (N, 4) array of
+    axis-aligned x_min, y_min, x_max, y_max rectangles
+    """
+    if len(boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    pts = np.asarray(boxes, dtype=np.float64).reshape(len(boxes), -1, 2)
+    return np.concatenate([pts.min(axis=1), pts.max(axis=1)], axis=1)
+
+
+def pairwise_iou(rects_a, rects_b):
+    """
+    IoU matrix of shape (len(rects_a), len(rects_b)) for axis-aligned rectangles
+    """
+    ax0, ay0, ax1, ay1 = (rects_a[:, i, None] for i in range(4))
+    bx0, by0, bx1, by1 = (rects_b[None, :, i] for i in range(4))
+
+    inter_w = np.maximum(0, np.minimum(ax1, bx1) - np.maximum(ax0, bx0))
+    inter_h = np.maximum(0, np.minimum(ay1, by1) - np.maximum(ay0, by0))
+    inter = inter_w * inter_h
+    area_a = (ax1 - ax0) * (ay1 - ay0)
+    area_b = (bx1 - bx0) * (by1 - by0)
+    union = area_a + area_b - inter
+
+    iou = np.zeros_like(inter)
+    np.divide(inter, union, out=iou, where=union > 0)
+    return iou
+
+
+def merge_best_bbox(first_result, second_result):
+    """
+    Merge two lists of (box, text, conf) OCR results, keeping the most confident
+    reading for every group of overlapping boxes.
+
+    The IoU of every candidate pair is computed up front in one NumPy pass; the scan
+    below only indexes into that matrix, so it reproduces the original pairwise loop
+    (first overlapping merged box wins, a more confident candidate replaces it) exactly.
+    """
+    candidates = [res for res in first_result if res[2] >= CONF_FLOOR]
+    candidates += [res for res in second_result if res[2] >= CONF_FLOOR]
+    if not candidates:
+        return []
+
+    rects = quads_to_rects([box for box, _, _ in candidates])
+    overlaps = pairwise_iou(rects, rects) > IOU_THRESHOLD
+    confs = [conf for _, _, conf in candidates]
+
+    slots = np.empty(len(candidates), dtype=np.intp)
+    n_slots = 0
+    for i in range(len(candidates)):
+        hits = np.flatnonzero(overlaps[i, slots[:n_slots]])
+        if hits.size:
+            j = hits[0]
+            if confs[i] > confs[slots[j]]:
+                slots[j] = i
+        else:
+            slots[n_slots] = i
+            n_slots += 1
+    return [candidates[i] for i in slots[:n_slots]]
@@ -0,0 +1,130 @@
+import threading
+import weakref
+import cv2
+import numpy as np
+
+# arrays kept per (width, height, channels) key
+POOL_ARRAYS_PER_KEY = 4
+
+
+class _Lease:
+    """
+    Owner of one array handed out by BufferPool. The array and every view of it keep the
+    lease alive through their .base chain, so the storage goes back to the pool exactly
+    when the last of them is dropped.
+    """
+    def __init__(self, storage, shape):
+        self.storage = storage
+        self.__array_interface__ = {**storage.__array_interface__, "shape": shape, "strides": None}
+
+
+class BufferPool:
+    """
+    Frame-sized uint8 arrays keyed by (width, height, channels).
+
+    Each acquired array is leased: its storage returns to the pool once the array and all
+    views of it are gone (for example when the GUI dropped the QImage wrapping a painted
+    frame), so steady operation reuses the same few allocations instead of fragmenting the heap.
+    """
+    def __init__(self, per_key=POOL_ARRAYS_PER_KEY):
+        self.per_key = per_key
+        # storage of returned leases, ready to be handed out again
+        self._free = {}
+        # finalizers may run from the garbage collector while this thread holds the lock
+        self._lock = threading.RLock()
+        self._leased_bytes = 0
+        self.reused = 0
+        self.allocated = 0
+
+    def acquire(self, width, height, channels=1):
+        key = (width, height, channels)
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                storage = free.pop()
+                self.reused += 1
+            else:
+                storage = np.empty(width * height * channels, dtype=np.uint8)
+                self.allocated += 1
+            self._leased_bytes += storage.nbytes
+        lease = _Lease(storage, shape)
+        weakref.finalize(lease, self._release, key, storage)
+        return np.asarray(lease)
+
+    def _release(self, key, storage):
+        with self._lock:
+            self._leased_bytes -= storage.nbytes
+            free = self._free.setdefault(key, [])
+            # past per_key spare arrays the storage is simply left to the garbage collector
+            if len(free) < self.per_key:
+                free.append(storage)
+
+    def trim(self):
+        """
+        Drop every array nobody is using
+        """
+        with self._lock:
+            self._free.clear()
+
+    def nbytes(self):
+        """
+        Bytes held by arrays in use plus spare ones
+        """
+        with self._lock:
+            return self._leased_bytes + sum(storage.nbytes for free in self._free.values() for storage in free)
+
+    def stats(self):
+        return {"reused": self.reused, "allocated": self.allocated, "bytes": self.nbytes()}
+
+
+# shared by the conversion buffers and the painted frames
+frame_pool = BufferPool()
+
+
+class ConversionBuffers:
+    """
+    Preallocated targets for the per-frame colour conversions.
+    Buffers are only reallocated when the frame size changes.
+
+    Greyscale buffers alternate between two arrays so the previous frame's grey
+    image stays valid while the next one is converted (incremental OCR diffs them).
+    Buffers come from pool, so switching back to an earlier window size reuses them.
+    """
+    def __init__(self, pool=frame_pool):
+        self.pool = pool
+        self._size = None
+        self._bgr = None
+        self._channel_max = None
+        self._grey = [None, None]
+        self._turn = 0
+
+    def _ensure(self, height, width):
+        if self._size == (height, width):
+            return
+        self._size = (height, width)
+        self._bgr = self._channel_max = None
+        self._grey = [None, None]
+        self._bgr = self.pool.acquire(width, height, 3)
+        self._channel_max = self.pool.acquire(width, height)
+        self._grey = [self.pool.acquire(width, height) for _ in range(2)]
+
+    def convert(self, frame):
+        """
+        Convert a BGRA frame into (bgr, grey) using the preallocated buffers
+        """
+        height, width = frame.shape[:2]
+        self._ensure(height, width)
+        self._turn ^= 1
+        bgr = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=self._bgr)
+        grey = cv2.cvtColor(frame, cv2.COLOR_BGRA2GRAY, dst=self._grey[self._turn])
+        return bgr, grey
+
+    def channel_max(self, bgr):
+        """
+        Brightest channel of each pixel, written into the preallocated buffer
+        when bgr is full-frame (crops get a fresh array)
+        """
+        if bgr.shape[:2] != self._size:
+            return bgr.max(axis=2)
+        return np.max(bgr, axis=2, out=self._channel_max)
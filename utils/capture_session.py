@@ -0,0 +1,110 @@
+import itertools
+from abc import ABC, abstractmethod
+import numpy as np
+from .buffers import frame_pool
+
+
+class BaseCaptureSession(ABC):
+    """
+    Capture of one window kept open across grabs.
+
+    grab() returns the newest frame as a packed (height, width, 4) BGRA array taken from
+    pool, so the same few buffers are reused once nothing references earlier frames. The
+    backend writes into the buffer it is given (_grab_into); when the window changed size
+    it reports the new size instead, and the grab is retried with a matching buffer.
+    """
+    def __init__(self, hwnd, timeout_ms=2000, pool=frame_pool):
+        self.hwnd = hwnd
+        self.timeout_ms = timeout_ms
+        self.pool = pool
+        self.width = None
+        self.height = None
+        self.grabs = 0
+        self.resizes = 0
+
+    @property
+    @abstractmethod
+    def is_open(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def _grab_into(self, buffer):
+        """
+        Write the next frame into buffer; returns None when done, or the frame's
+        (width, height) when buffer is None or doesn't fit
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def _close(self):
+        raise NotImplementedError
+
+    def grab(self):
+        if not self.is_open:
+            raise RuntimeError("capture session is not open")
+        # at most one retry: the backend keeps the frame it couldn't deliver
+        for _ in range(2):
+            buffer = None if self.width is None else self.pool.acquire(self.width, self.height, 4)
+            size = self._grab_into(buffer)
+            if size is None:
+                self.grabs += 1
+                return buffer
+            self.width, self.height = size
+            self.resizes += 1
+        raise RuntimeError("capture buffer does not match the frame size")
+
+    def close(self):
+        if self.is_open:
+            self._close()
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FakeCaptureSession(BaseCaptureSession):
+    """
+    Pure-Python session replaying frames (cycled) for tests and platforms without WGC.
+    Follows the DLL's contract: frames are copied into the caller's buffer, a buffer of
+    the wrong size gets the frame's size back.
+    """
+    def __init__(self, hwnd, frames, timeout_ms=2000, pool=frame_pool):
+        super().__init__(hwnd, timeout_ms, pool)
+        self.frames = list(frames)
+        self._frames = None
+        self._pending = None
+        self.opened = 0
+        self.closed = 0
+
+    @property
+    def is_open(self):
+        return self._frames is not None
+
+    def open(self):
+        if self.is_open:
+            return
+        self._frames = itertools.cycle(self.frames)
+        self._pending = None
+        self.opened += 1
+
+    def _grab_into(self, buffer):
+        if self._pending is None:
+            self._pending = next(self._frames)
+        frame = self._pending
+        height, width = frame.shape[:2]
+        if buffer is None or buffer.shape != (height, width, 4):
+            return width, height
+        np.copyto(buffer, frame)
+        self._pending = None
+
+    def _close(self):
+        self._frames = None
+        self._pending = None
+        self.closed += 1
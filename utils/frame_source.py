@@ -0,0 +1,216 @@
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+# frames per second delivered by a streaming source
+DEFAULT_FPS = 5
+# frames held between producer and consumer; older ones are dropped
+DEFAULT_BUFFER_SIZE = 2
+
+
+def read_image(path: str):
+    """
+    Load an image file as a BGRA frame
+    """
+    # imdecode instead of imread so non-ASCII paths work on Windows
+    image = cv2.imdecode(np.fromfile(path, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if image is None:
+        raise RuntimeError(f"Could not read image: {path}")
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGRA)
+    if image.shape[2] == 3:
+        return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA)
+    return image
+
+
+def image_files(path: str):
+    """
+    Image files a path stands for: a directory's images in name order, or the path
+    itself if it is an image file. None for anything else (a video)
+    """
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path)
+                      if name.lower().endswith(IMAGE_EXTENSIONS))
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        return [path]
+    return None
+
+
+class FrameSource(ABC):
+    """
+    Something that produces captured frames as BGRA NumPy arrays (height, width, 4)
+
+    grab() returns the next frame, or None once the source is exhausted.
+    """
+    @abstractmethod
+    def grab(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class WGCFrameSource(FrameSource):
+    """
+    Frames of a live window captured through the Windows Graphics Capture DLL, over one
+    capture session kept open until close() (per-frame captures with older DLL builds)
+    """
+    def __init__(self, hwnd: int, timeout_ms=2000):
+        # imported lazily: loading the DLL only works on Windows
+        from . import tools
+        self._tools = tools
+        self.hwnd = hwnd
+        self.timeout_ms = timeout_ms
+        self._session = tools.CaptureSession(hwnd, timeout_ms) if tools.HAS_SESSIONS else None
+
+    def grab(self):
+        if self._session is None:
+            return self._tools.capture_hwnd_to_image(self.hwnd, self.timeout_ms)
+        # opened on the capturing thread, on first use
+        self._session.open()
+        return self._session.grab()
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+class ReplayFrameSource(FrameSource):
+    """
+    Replays an image file, a directory of images (in name order) or a video file
+    so the pipeline can be driven without a live window. Videos are sampled every
+    step frames; frame_index is the video frame number of the last grab
+    """
+    def __init__(self, path: str, loop=False, step=1):
+        self.path = path
+        self.loop = loop
+        self.step = step
+        self.frame_index = -1
+        self._video = None
+        self._index = 0
+
+        self._files = image_files(path)
+        if self._files is None:
+            self._files = []
+            self._video = cv2.VideoCapture(path)
+            if not self._video.isOpened():
+                raise RuntimeError(f"Could not open video: {path}")
+
+    def _read_video(self):
+        # skip to the next sampled frame; grab() only demuxes, so skipped frames aren't decoded
+        for _ in range(self.step - 1 if self.frame_index >= 0 else 0):
+            if not self._video.grab():
+                return None
+            self.frame_index += 1
+        ok, frame = self._video.read()
+        if not ok:
+            return None
+        self.frame_index += 1
+        return frame
+
+    def grab(self):
+        if self._video is not None:
+            frame = self._read_video()
+            if frame is None and self.loop:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                self.frame_index = -1
+                frame = self._read_video()
+            if frame is None:
+                return None
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+
+        if self._index >= len(self._files):
+            if not self.loop or not self._files:
+                return None
+            self._index = 0
+        path = self._files[self._index]
+        self._index += 1
+        return read_image(path)
+
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+            self._video = None
+
+
+class StreamingFrameSource:
+    """
+    Pulls frames from a FrameSource on a background thread at a target FPS.
+
+    Frames go into a small ring buffer; when the consumer falls behind the oldest
+    frames are dropped, and latest() always hands out the newest one.
+    """
+    def __init__(self, source: FrameSource, fps=DEFAULT_FPS, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.source = source
+        self.interval = 1.0 / fps
+        self._buffer = deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.produced = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.grab_seconds = 0.0
+        self.error = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._produce, name="frame-producer", daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                frame = self.source.grab()
+                self.grab_seconds = time.perf_counter() - start
+            except Exception as e:
+                self.error = e
+                break
+            if frame is None:
+                break
+
+            with self._lock:
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.dropped += 1
+                self._buffer.append(frame)
+                self.produced += 1
+
+            next_time += self.interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # running behind, don't try to catch up with a burst
+                next_time = time.perf_counter()
+
+    def latest(self):
+        """
+        Newest buffered frame or None; older buffered frames are discarded as stale
+        """
+        with self._lock:
+            if not self._buffer:
+                return None
+            frame = self._buffer.pop()
+            self.dropped += len(self._buffer)
+            self._buffer.clear()
+            self.delivered += 1
+            return frame
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.source.close()
@@ -0,0 +1,21 @@
+import numpy as np
+from PySide6.QtGui import QImage
+
+
+def frame_to_qimage(frame):
+    """
+    Wrap a BGRA frame (H, W, 4 uint8, rows may be padded) in a QImage without copying.
+    The caller must keep frame alive for as long as the QImage is used.
+    """
+    height, width = frame.shape[:2]
+    stride = frame.strides[0]
+    # padded rows aren't C-contiguous; expose the byte span from the first to the last pixel instead
+    span = np.lib.stride_tricks.as_strided(frame, shape=((height - 1) * stride + width * 4,), strides=(1,))
+    return QImage(span.data, width, height, stride, QImage.Format.Format_ARGB32)
+
+
+def frame_nbytes(frame):
+    """
+    Bytes spanned by a possibly stride-padded frame
+    """
+    return frame.strides[0] * frame.shape[0]
@@ -0,0 +1,25 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# connections kept alive per host
+POOL_SIZE = 8
+# seconds before a translation request is abandoned
+REQUEST_TIMEOUT = 15
+
+_session = None
+_lock = threading.Lock()
+
+
+def session():
+    """
+    Process-wide requests session so all HTTP translators share pooled keep-alive connections
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+from .boxes import quads_to_rects
+
+# side length in pixels of the square tiles compared between frames
+TILE_SIZE = 64
+# per-pixel grey difference that counts as a change (ignores dithering / compression noise)
+PIXEL_DIFF_THRESHOLD = 24
+# changed tiles are grown by this many tiles in every direction before re-running OCR
+MARGIN_TILES = 1
+
+
+class IncrementalOCR:
+    """
+    Keeps the previous frame and its OCR entries so only the parts of a new frame
+    that changed have to go through detection, recognition and translation again.
+
+    Entries are (box, text, conf, translated) tuples in full-frame coordinates.
+    """
+    def __init__(self, tile_size=TILE_SIZE, pixel_threshold=PIXEL_DIFF_THRESHOLD, margin_tiles=MARGIN_TILES):
+        self.tile_size = tile_size
+        self.pixel_threshold = pixel_threshold
+        self.margin_tiles = margin_tiles
+        self.prev_grey = None
+        self.prev_entries = []
+        self.stats = {}
+
+    def reset(self):
+        self.prev_grey = None
+        self.prev_entries = []
+        self.stats = {}
+
+    def changed_tiles(self, grey):
+        """
+        Boolean (rows, cols) mask of tiles where grey differs from the previous frame
+        """
+        t = self.tile_size
+        height, width = grey.shape
+        rows, cols = -(-height // t), -(-width // t)
+
+        changed = cv2.absdiff(grey, self.prev_grey) > self.pixel_threshold
+        padded = np.zeros((rows * t, cols * t), dtype=bool)
+        padded[:height, :width] = changed
+        return padded.reshape(rows, t, cols, t).any(axis=(1, 3))
+
+    def plan(self, grey):
+        """
+        Compare grey against the previous frame.
+
+        Returns (regions, reused): pixel rectangles (x0, y0, x1, y1) that need fresh OCR
+        and the cached entries lying entirely outside them.
+        Returns (None, []) when there is no usable previous frame.
+        """
+        if self.prev_grey is None or self.prev_grey.shape != grey.shape:
+            height, width = grey.shape
+            tiles = -(-height // self.tile_size) * -(-width // self.tile_size)
+            self.stats = {"tiles_total": tiles, "tiles_reused": 0, "regions": 1,
+                          "boxes_reused": 0, "full_frame": True}
+            return None, []
+
+        t = self.tile_size
+        height, width = grey.shape
+        mask = self.changed_tiles(grey).astype(np.uint8)
+        if self.margin_tiles:
+            k = 2 * self.margin_tiles + 1
+            mask = cv2.dilate(mask, np.ones((k, k), dtype=np.uint8))
+
+        regions = []
+        count, _, comp_stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        for x, y, w, h, _ in comp_stats[1:count].tolist():
+            regions.append([x * t, y * t, min((x + w) * t, width), min((y + h) * t, height)])
+
+        # grow each region over cached boxes it cuts through so that text is re-read whole
+        rects = quads_to_rects([entry[0] for entry in self.prev_entries])
+        for region in regions:
+            hit = self._overlapping(rects, region)
+            if hit.any():
+                region[0] = max(0, min(region[0], int(rects[hit, 0].min())))
+                region[1] = max(0, min(region[1], int(rects[hit, 1].min())))
+                region[2] = min(width, max(region[2], int(np.ceil(rects[hit, 2].max()))))
+                region[3] = min(height, max(region[3], int(np.ceil(rects[hit, 3].max()))))
+
+        touched = np.zeros(len(rects), dtype=bool)
+        for region in regions:
+            touched |= self._overlapping(rects, region)
+
+        reused = [entry for entry, hit in zip(self.prev_entries, touched) if not hit]
+        tiles_total = mask.size
+        self.stats = {"tiles_total": tiles_total,
+                      "tiles_reused": tiles_total - int(mask.sum()),
+                      "regions": len(regions),
+                      "boxes_reused": len(reused),
+                      "full_frame": False}
+        return [tuple(r) for r in regions], reused
+
+    @staticmethod
+    def _overlapping(rects, region):
+        x0, y0, x1, y1 = region
+        return (rects[:, 0] < x1) & (rects[:, 2] > x0) & (rects[:, 1] < y1) & (rects[:, 3] > y0)
+
+    def update(self, grey, entries):
+        self.prev_grey = grey
+        self.prev_entries = entries
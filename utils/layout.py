@@ -0,0 +1,198 @@
+import numpy as np
+from .boxes import quads_to_rects
+
+# boxes this much taller than wide (with more than one character) are vertical text
+VERTICAL_ASPECT = 1.5
+# boxes on one line overlap by at least this fraction of the smaller box's line height
+LINE_OVERLAP = 0.5
+# largest gap between neighbouring boxes of one line, in line heights
+LINE_GAP = 1.5
+# largest gap between consecutive lines of one paragraph, in line heights
+PARAGRAPH_GAP = 0.8
+# lines of one paragraph differ in height by at most this factor
+LINE_HEIGHT_RATIO = 1.5
+# furigana: boxes at most this fraction of the height of the line they sit on
+FURIGANA_RATIO = 0.6
+
+
+def _is_cjk(char):
+    code = ord(char)
+    return (0x3000 <= code <= 0x30FF or 0x3400 <= code <= 0x4DBF or 0x4E00 <= code <= 0x9FFF
+            or 0xF900 <= code <= 0xFAFF or 0xFF00 <= code <= 0xFFEF)
+
+
+def _is_kana(text):
+    return bool(text) and all(0x3040 <= ord(char) <= 0x30FF for char in text.strip())
+
+
+def join_lines(texts):
+    """
+    Join the lines of a paragraph: no separator between Japanese / Chinese text wrapped
+    across lines, a space otherwise
+    """
+    joined = ""
+    for text in texts:
+        text = text.strip()
+        if joined and text and not (_is_cjk(joined[-1]) and _is_cjk(text[0])):
+            joined += " "
+        joined += text
+    return joined
+
+
+class _Groups:
+    """
+    Union-find over n items
+    """
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        self.parent[self.find(i)] = self.find(j)
+
+    def groups(self):
+        members = {}
+        for i in range(len(self.parent)):
+            members.setdefault(self.find(i), []).append(i)
+        return list(members.values())
+
+
+def _union_rect(rects):
+    return np.array([rects[:, 0].min(), rects[:, 1].min(), rects[:, 2].max(), rects[:, 3].max()])
+
+
+def _cluster(rects, vertical, gap):
+    """
+    Group rects (all one orientation) that continue each other along the reading
+    direction; gap is the largest gap along it, in units of the rects' line thickness.
+
+    In horizontal text a line runs along x and has a height; in vertical text a column
+    runs along y and has a width, so vertical text is handled by swapping the axes.
+    """
+    if vertical:
+        rects = rects[:, [1, 0, 3, 2]]
+    groups = _Groups(len(rects))
+    for i in range(len(rects)):
+        for j in range(i + 1, len(rects)):
+            a, b = rects[i], rects[j]
+            thickness = min(a[3] - a[1], b[3] - b[1])
+            overlap = min(a[3], b[3]) - max(a[1], b[1])
+            distance = max(a[0], b[0]) - min(a[2], b[2])
+            if thickness > 0 and overlap >= LINE_OVERLAP * thickness and distance <= gap * thickness:
+                groups.union(i, j)
+    return groups.groups()
+
+
+def _stack(lines, vertical):
+    """
+    Group lines (rects of one orientation) into paragraphs: similar thickness, close
+    across the reading direction and overlapping along it
+    """
+    if vertical:
+        lines = lines[:, [1, 0, 3, 2]]
+    groups = _Groups(len(lines))
+    for i in range(len(lines)):
+        for j in range(i + 1, len(lines)):
+            a, b = lines[i], lines[j]
+            ha, hb = a[3] - a[1], b[3] - b[1]
+            if min(ha, hb) <= 0 or max(ha, hb) > LINE_HEIGHT_RATIO * min(ha, hb):
+                continue
+            along = min(a[2], b[2]) - max(a[0], b[0])
+            across = max(a[1], b[1]) - min(a[3], b[3])
+            if along > 0 and across <= PARAGRAPH_GAP * min(ha, hb):
+                groups.union(i, j)
+    return groups.groups()
+
+
+def drop_furigana(texts, rects):
+    """
+    Indices of the texts that are not furigana: small kana readings sitting right above
+    (or, in vertical text, right of) a larger box they overlap
+    """
+    keep = []
+    for i, (x0, y0, x1, y1) in enumerate(rects):
+        h, w = y1 - y0, x1 - x0
+        ruby = False
+        if not _is_kana(texts[i]):
+            keep.append(i)
+            continue
+        for j, (bx0, by0, bx1, by1) in enumerate(rects):
+            if i == j:
+                continue
+            bh, bw = by1 - by0, bx1 - bx0
+            above = (h <= FURIGANA_RATIO * bh and min(x1, bx1) - max(x0, bx0) > 0.5 * w
+                     and 0 <= by0 - y1 + h * 0.5 <= h)
+            beside = (w <= FURIGANA_RATIO * bw and bh > bw and min(y1, by1) - max(y0, by0) > 0.5 * h
+                      and 0 <= x0 - bx1 + w * 0.5 <= w)
+            if above or beside:
+                ruby = True
+                break
+        if not ruby:
+            keep.append(i)
+    return keep
+
+
+def group_paragraphs(entries):
+    """
+    Cluster (box, text, conf, translated) entries into paragraphs in reading order.
+
+    Boxes continuing each other are joined into lines (left to right, or top to bottom
+    for vertical Japanese), lines stacked closely into paragraphs (top to bottom, or
+    right to left for vertical columns), and furigana is dropped. Each paragraph becomes
+    one entry covering the union of its boxes, so it is translated as one segment and its
+    translation is laid out over the whole region.
+
+    Returns (paragraph entries, number of furigana boxes dropped)
+    """
+    if len(entries) < 2:
+        return list(entries), 0
+    rects = quads_to_rects([entry[0] for entry in entries])
+    keep = drop_furigana([entry[1] for entry in entries], rects)
+    furigana = len(entries) - len(keep)
+    entries = [entries[i] for i in keep]
+    rects = rects[keep]
+
+    widths, heights = rects[:, 2] - rects[:, 0], rects[:, 3] - rects[:, 1]
+    vertical = np.array([h > VERTICAL_ASPECT * w and len(entry[1]) > 1
+                         for entry, w, h in zip(entries, widths, heights)], dtype=bool)
+
+    paragraphs = []
+    for orientation in (False, True):
+        indices = np.flatnonzero(vertical == orientation)
+        if not indices.size:
+            continue
+        sub = rects[indices]
+        lines = [indices[line] for line in _cluster(sub, orientation, LINE_GAP)]
+        # boxes of a line in reading order
+        along = 1 if orientation else 0
+        lines = [line[np.argsort(rects[line, along])] for line in lines]
+        line_rects = np.array([_union_rect(rects[line]) for line in lines])
+        for paragraph in _stack(line_rects, orientation):
+            if orientation:
+                # vertical columns are read right to left
+                order = sorted(paragraph, key=lambda k: -line_rects[k, 2])
+            else:
+                order = sorted(paragraph, key=lambda k: line_rects[k, 1])
+            paragraphs.append([lines[k] for k in order])
+
+    grouped = []
+    for paragraph in paragraphs:
+        members = [i for line in paragraph for i in line]
+        x0, y0, x1, y1 = (int(v) for v in _union_rect(rects[members]))
+        if len(members) == 1:
+            grouped.append(entries[members[0]])
+            continue
+        lines = ["".join(entries[i][1] for i in line) if vertical[line[0]]
+                 else join_lines(entries[i][1] for i in line) for line in paragraph]
+        lengths = np.array([max(1, len(entries[i][1])) for i in members], dtype=np.float64)
+        conf = float(np.dot([entries[i][2] for i in members], lengths) / lengths.sum())
+        grouped.append(([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], join_lines(lines), conf, None))
+
+    # paragraphs top to bottom, then left to right
+    grouped.sort(key=lambda entry: (entry[0][0][1], entry[0][0][0]))
+    return grouped, furigana
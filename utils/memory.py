@@ -0,0 +1,85 @@
+import ctypes as C
+import os
+import sys
+
+
+class _ProcessMemoryCounters(C.Structure):
+    _fields_ = [
+        ("cb", C.c_uint32),
+        ("PageFaultCount", C.c_uint32),
+        ("PeakWorkingSetSize", C.c_size_t),
+        ("WorkingSetSize", C.c_size_t),
+        ("QuotaPeakPagedPoolUsage", C.c_size_t),
+        ("QuotaPagedPoolUsage", C.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", C.c_size_t),
+        ("QuotaNonPagedPoolUsage", C.c_size_t),
+        ("PagefileUsage", C.c_size_t),
+        ("PeakPagefileUsage", C.c_size_t),
+    ]
+
+
+def process_memory():
+    """
+    (current, peak) resident memory of this process in bytes, (None, None) where unknown
+    """
+    if sys.platform == "win32":
+        counters = _ProcessMemoryCounters()
+        counters.cb = C.sizeof(counters)
+        kernel32 = C.windll.kernel32
+        kernel32.GetCurrentProcess.restype = C.c_void_p
+        if C.windll.psapi.GetProcessMemoryInfo(C.c_void_p(kernel32.GetCurrentProcess()),
+                                               C.byref(counters), counters.cb):
+            return counters.WorkingSetSize, counters.PeakWorkingSetSize
+        return None, None
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        # ru_maxrss is in KiB on Linux
+        return current, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError, ValueError):
+        return None, None
+
+
+def _cuda():
+    """
+    torch's CUDA module if torch is already loaded and CUDA is initialized (never imports torch)
+    """
+    torch = sys.modules.get("torch")
+    if torch is None or not torch.cuda.is_available() or not torch.cuda.is_initialized():
+        return None
+    return torch.cuda
+
+
+def memory_stats():
+    """
+    Current and peak process / CUDA memory in bytes
+    """
+    current, peak = process_memory()
+    stats = {"rss": current, "peak_rss": peak}
+    cuda = _cuda()
+    if cuda is not None:
+        stats.update({"cuda": cuda.memory_allocated(),
+                      "peak_cuda": cuda.max_memory_allocated(),
+                      "cuda_reserved": cuda.memory_reserved()})
+    return stats
+
+
+def release_gpu_memory():
+    """
+    Hand cached but unused CUDA blocks back to the driver
+    """
+    cuda = _cuda()
+    if cuda is not None:
+        cuda.empty_cache()
+
+
+def format_memory(stats):
+    """
+    One-line readout of memory_stats() in MiB
+    """
+    parts = []
+    for label, current, peak in (("RAM", "rss", "peak_rss"), ("CUDA", "cuda", "peak_cuda")):
+        if stats.get(current) is not None:
+            parts.append(f"{label} {stats[current] / 2**20:.0f} MiB (peak {stats[peak] / 2**20:.0f})")
+    return " | ".join(parts)
@@ -1,159 +1,448 @@
-import easyocr
-from PySide6.QtCore import QObject, Signal, Slot, Qt, QRect
-from PySide6.QtGui import QImage, QPainter, QColor, QFont, QFontDatabase, QFontMetrics
-from .translator import DeepLTranslator
-import cv2
-import torch
+from PySide6.QtCore import QObject, Signal, Slot, Qt, QTimer
+from .translator import create_translator
+from .translation_cache import TranslationCache
+from .translation_pipeline import TranslationPipeline
+from .settings import get_setting, data_dir
+from .incremental import IncrementalOCR
+from .tracking import TextTracker
+from .layout import group_paragraphs
+from .ocr_scheduler import OCRScheduler, OCRJob
+from .overlay import overlay_items
+from . import roi_profiles
+from .metrics import MetricsRecorder, StageTimer
+from .result_cache import LRUCache, FRAME_CACHE_ENTRIES, frame_hash
+from .buffers import frame_pool
+from .frames import frame_nbytes
+from .memory import memory_stats, release_gpu_memory
+from .session_store import SessionWriter
+from . import boxes
+import logging
 import numpy as np
+import os
+import time
+
+# how often the worker checks whether it has been idle long enough to trim memory
+IDLE_CHECK_MS = 5000
+# settings the worker consults on every frame; cached, and re-read by reload_settings
+FRAME_SETTINGS = ("ocr/batch_sources", "ocr/dual_pass", "ocr/adaptive_resolution", "ocr/detect_long_side",
+                  "ocr/incremental", "ocr/group_paragraphs", "ocr/tracking", "ocr/stable_frames",
+                  "translation/target_lang", "session/record", "session/directory",
+                  "memory/idle_trim_seconds")
+
+log = logging.getLogger(__name__)
+
+
+def read_frame_settings():
+    return {name: get_setting(name) for name in FRAME_SETTINGS}
+
+
+class SourceState:
+    """
+    OCR state of one captured window (source)
+    """
+    def __init__(self):
+        # frame conversions (CPU or GPU), created with the model
+        self.preprocessor = None
+        self.incremental = IncrementalOCR()
+        self.tracker = TextTracker()
+        self.rois = []
+        self.generation = 0
+        self.current_frame = None
+        # frame_key of current_frame; the GUI skips re-converting a frame it already shows
+        self.frame_key = None
+        # segments before / after paragraph grouping in the last OCR'd frame
+        self.layout_stats = {}
+        # host bytes written while preparing the last frame (PreparedImage.copied)
+        self.bytes_copied = 0
 
 
 class OCRWorker(QObject):
     """
-    Persistent worker to annotate received QImage using EasyOCR
+    Persistent worker to annotate captured frames using EasyOCR
+
+    Frames are queued on the scheduler (one pending frame per source) and picked up by
+    process_pending; run_OCR processes a frame of the default source (None) right away.
 
     Emits:
-        result_ready (QImage): The image with bounding boxes drawn around detected text.
-        finished (): Signal emitted when OCR processing is complete.
+        result_ready (object, object, object, list): source, frame key, frame and the
+            OverlayItems to paint over it. Emitted right after OCR with source text / cached
+            translations, and again (frame None, only the items changed) once the remaining
+            translations arrive. The frame is a pooled copy the GUI may hold on to.
+        finished (): Signal emitted when OCR processing of a batch of frames is complete.
+        model_ready (): The OCR model finished loading (and warming up) on the worker thread.
+        model_failed (str): Loading the OCR model failed.
         running (): Optional signal indicating OCR is in progress.
+        stats_ready (dict): Incremental OCR statistics for the last frame (tiles reused, boxes reused)
+            plus frame / crop cache hit rates and current / peak memory.
+        metrics_ready (dict): {stage: seconds} for the last frame, and again for the
+            background translation / repaint when it completes.
+        ocr_failed (list, str): OCR of the frames of these sources raised; the error message.
     """
     finished = Signal()
     running = Signal()
-    result_ready = Signal(QImage)
+    model_ready = Signal()
+    model_failed = Signal(str)
+    result_ready = Signal(object, object, object, list)
+    stats_ready = Signal(dict)
+    metrics_ready = Signal(dict)
+    translations_ready = Signal(object, int, dict, float)
+    wake = Signal()
+    ocr_failed = Signal(list, str)
 
 
-    def __init__(self):
-        self.available_fonts = QFontDatabase().families()
+    def __init__(self, gpu=None):
         """
-        Initialize the OCRWorker and load EasyOCR model
-        OCR model initialized once for performance
+        Initialize the OCRWorker; the EasyOCR model is loaded later by load_model,
+        on the worker thread, so constructing the worker stays cheap
+        gpu: force the model on (True) or off (False) CUDA; None picks CUDA when available
         """
         super().__init__()
-        if torch.cuda.is_available():
-            self.reader = easyocr.Reader(['ja','en'], gpu=True)
-        else:
-            self.reader = easyocr.Reader(['ja','en'])
-        self.translator = DeepLTranslator()
-
-    def paintImage(self, input_image, result, translated_texts):
-        qimage = input_image
-        # Paint on the qimage using QPainter
-        painter = QPainter(qimage)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setRenderHint(QPainter.RenderHint.TextAntialiasing)
-
-        font = QFont("Meiryo", 14)
-        painter.setFont(font)
-
-        # draw bounding box around detected text
-        for (box, text, conf), translated in zip(result, translated_texts):
-            top_left = tuple(map(int, box[0]))
-            bottom_right = tuple(map(int, box[2]))
-            x, y = top_left
-            w = bottom_right[0] - x
-            h = bottom_right[1] - y
-
-            painter.setBrush(QColor(0, 0, 0, 200))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawRect(x, y, w, h)
-
-            font_size = 14
-            font = QFont("Noto Sans JP" if "Noto Sans JP" in self.available_fonts else "Meiryo", font_size)
-            metrics = QFontMetrics(font)
-
-            # shrink font to fit the bounding box
-            while (metrics.horizontalAdvance(translated) > w or metrics.height() > h) and font_size > 1:
-                font_size -= 1
-                font.setPointSize(font_size)
-                metrics = QFontMetrics(font)
-
-            painter.setFont(font)
-            painter.setPen(QColor(255, 255, 255))
-
-            text_rect = QRect(x, y, w, h)
-            painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignHCenter, translated)
-
-        painter.end()
-        return qimage
-    
-    def run(self, image):
-        result = self.reader.readtext(image, decoder='greedy', 
-                                    text_threshold = 0.5, 
-                                    batch_size=16,
-                                    detail=1)
-        return result
-    
-    def iou(self, box1, box2):
-        x1_min, y1_min = min(p[0] for p in box1), min(p[1] for p in box1)
-        x1_max, y1_max = max(p[0] for p in box1), max(p[1] for p in box1)
-        x2_min, y2_min = min(p[0] for p in box2), min(p[1] for p in box2)
-        x2_max, y2_max = max(p[0] for p in box2), max(p[1] for p in box2)
-
-        inter_w = max(0, min(x1_max, x2_max) - max(x1_min, x2_min))
-        inter_h = max(0, min(y1_max, y2_max) - max(y1_min, y2_min))
-        inter = inter_w * inter_h
-        area1 = (x1_max - x1_min) * (y1_max - y1_min)
-        area2 = (x2_max - x2_min) * (y2_max - y2_min)
-        union = area1 + area2 - inter
-        return inter / union if union > 0 else 0
-
-    def merge_best_bbox(self, first_result, second_result):
-        CONF_FLOOR = 0.4
-        merged=[]
-        filtered_original_result = [(box, txt, conf) for (box, txt, conf) in first_result if conf >= CONF_FLOOR]
-        filtered_grey_result = [(box, txt, conf) for (box, txt, conf) in second_result if conf >= CONF_FLOOR]
-
-        for candidate in filtered_original_result + filtered_grey_result:
-            box, txt, conf = candidate
-            keep = True
-            for i, (m_box, m_txt, m_conf) in enumerate(merged):
-                if self.iou(box, m_box) > 0.5:
-                    if conf > m_conf:
-                        merged[i] = candidate
-                    keep = False
-                    break
-            if keep:
-                merged.append(candidate)
-        return merged
-    
-    @Slot(QImage)
-    def run_OCR(self, received_image: QImage):
-        """
-        Perform OCR on a received QImage and emit the annotated result.
-        """
-        # convert QImage to a format suitable for OCR and drawing
-        received_image = received_image.convertToFormat(QImage.Format.Format_RGBA8888)
-        qimage = received_image.copy()
-
-        # convert to NumPy array for EasyOCR
-        width = qimage.width()
-        height = qimage.height()
-        ptr = qimage.bits()
-        image_arr = np.asarray(ptr, dtype=np.uint8).reshape((height, width, 4))
-
-        ocr_image = cv2.cvtColor(image_arr, cv2.COLOR_RGBA2BGR)
-        grey_image_1_channel = cv2.cvtColor(image_arr, cv2.COLOR_RGBA2GRAY)
-        ocr_image_grey = cv2.cvtColor(grey_image_1_channel, cv2.COLOR_GRAY2BGR)
-
-
-
-        original_results = self.run(ocr_image)
-        grey_results = self.run(ocr_image_grey)
-
-        merged = self.merge_best_bbox(original_results, grey_results)
-
-        texts = [text for _, text, _ in merged]
-        uniq_order = []
-        seen = {}
-
-        for t in texts:
-            if t not in seen:
-                seen[t] = len(uniq_order)
-                uniq_order.append(t)
-        # batch translate
-        translated_uniq = self.translator.translate_many(uniq_order, target_lang="EN-US")
-        translated_texts = [translated_uniq[seen[t]] for t in texts]
-
-        edited_image = self.paintImage(qimage, merged, translated_texts)
-
-        self.result_ready.emit(edited_image)
-        self.finished.emit()
\ No newline at end of file
+        self.gpu = gpu
+        self.engine = None
+        # FRAME_SETTINGS by name, so a frame doesn't go through QSettings
+        self.settings = read_frame_settings()
+        # one cache for every translator the worker builds, opened with the first that needs it
+        self.translation_cache = None
+        self.translator = self.build_translator()
+        self.translation_pipeline = TranslationPipeline(self.translator)
+        self.translations_ready.connect(self.apply_translations)
+        # queued even on the worker thread, so other slots run between batches
+        self.wake.connect(self.process_pending, Qt.ConnectionType.QueuedConnection)
+        self.generation = 0
+        self.sources = {}
+        self.scheduler = OCRScheduler()
+        # (box, text, conf) results of whole frames seen before, keyed by their pixels
+        self.frame_cache = LRUCache(FRAME_CACHE_ENTRIES)
+        self.metrics = MetricsRecorder()
+        # texts sent to the translator, for translation calls per minute
+        self.translations_requested = 0
+        # SessionWriter while session/record is on
+        self.recorder = None
+        self.last_ocr = time.perf_counter()
+        self.trimmed = False
+        self.idle_timer = None
+        self.metrics.add_hook(self.metrics_ready.emit)
+
+    @Slot()
+    def load_model(self):
+        """
+        Import torch / EasyOCR and load the model (once), optionally followed by a warm-up inference
+        """
+        if self.engine is not None:
+            return
+        try:
+            from .ocr_engine import OCREngine
+            languages = tuple(lang.strip() for lang in get_setting("ocr/languages").split(",") if lang.strip())
+            engine = OCREngine(languages or ("ja", "en"), gpu=self.gpu, dual_pass=get_setting("ocr/dual_pass"),
+                               adaptive=get_setting("ocr/adaptive_resolution"),
+                               detect_long_side=get_setting("ocr/detect_long_side"),
+                               gpu_preprocess=get_setting("ocr/gpu_preprocess"),
+                               backend=get_setting("ocr/backend"),
+                               quantize=get_setting("ocr/quantize"),
+                               threads=get_setting("ocr/cpu_threads"))
+            if get_setting("ocr/warmup"):
+                engine.warm_up()
+        except Exception as e:
+            self.model_failed.emit(str(e))
+            return
+        self.engine = engine
+        # created here so the timer lives on the worker thread
+        self.idle_timer = QTimer(self)
+        self.idle_timer.timeout.connect(self.trim_if_idle)
+        self.idle_timer.start(IDLE_CHECK_MS)
+        self.model_ready.emit()
+
+    @Slot()
+    def trim_if_idle(self):
+        """
+        Release unused pooled frame buffers and cached CUDA blocks once OCR has been idle
+        for memory/idle_trim_seconds, so a burst's peak isn't held for the whole session
+        """
+        idle_seconds = self.settings["memory/idle_trim_seconds"]
+        if self.trimmed or not idle_seconds or time.perf_counter() - self.last_ocr < idle_seconds:
+            return
+        frame_pool.trim()
+        release_gpu_memory()
+        self.trimmed = True
+
+    def state(self, source):
+        if source not in self.sources:
+            self.sources[source] = SourceState()
+        return self.sources[source]
+
+    @Slot(object, list)
+    def set_rois(self, source, rois):
+        """
+        Set the regions of interest (frame fractions) OCR of source is restricted to; empty for the whole frame
+        """
+        state = self.state(source)
+        if rois != state.rois:
+            state.rois = rois
+            state.incremental.reset()
+
+    @Slot()
+    def process_pending(self):
+        """
+        OCR the next queued frame(s) from the scheduler; wakes itself again while work is queued
+        so translations and other slots still get their turn in between
+        """
+        if self.engine is None:
+            # model still loading (the GUI only submits after model_ready)
+            self.scheduler.clear()
+            return
+        self.scheduler.batching = self.settings["ocr/batch_sources"]
+        jobs = self.scheduler.take()
+        try:
+            if jobs:
+                self.run_jobs(jobs)
+        finally:
+            # even after a failure, so the sources aren't left marked as running
+            if self.scheduler.done(jobs):
+                self.wake.emit()
+
+    @Slot(object)
+    def run_OCR(self, frame):
+        """
+        Perform OCR on a captured BGRA frame (NumPy view, rows may be padded) and emit the annotated result.
+        """
+        if self.engine is None:
+            self.finished.emit()
+            return
+        self.run_jobs([OCRJob(None, frame)])
+
+    def run_jobs(self, jobs):
+        """
+        OCR the frames of jobs (at most one per source), recognizing all of their text in one batch.
+        A failure is logged and reported through ocr_failed; finished is emitted either way
+        """
+        try:
+            self._run_jobs(jobs)
+        except Exception as e:
+            log.exception("OCR failed")
+            self.ocr_failed.emit([job.source for job in jobs], str(e))
+        finally:
+            self.finished.emit()
+
+    def _run_jobs(self, jobs):
+        timer = self.engine.timer = StageTimer()
+        self.last_ocr = time.perf_counter()
+        self.trimmed = False
+        settings = self.settings
+        self.engine.dual_pass = settings["ocr/dual_pass"]
+        self.engine.adaptive = settings["ocr/adaptive_resolution"]
+        self.engine.detect_long_side = settings["ocr/detect_long_side"]
+        incremental = settings["ocr/incremental"]
+        paragraphs = settings["ocr/group_paragraphs"]
+
+        # plan every frame first: cached result, or the images (full frame / changed regions) to OCR
+        plans = []
+        images = []
+        for job in jobs:
+            state = self.state(job.source)
+            # convert straight from the capture view into the source's reusable buffers (or on the GPU)
+            if state.preprocessor is None:
+                state.preprocessor = self.engine.preprocessor()
+            with timer.stage("convert"):
+                image = state.preprocessor.prepare(job.frame)
+                grey_image_1_channel = image.grey
+
+            height, width = grey_image_1_channel.shape
+            roi_rects = roi_profiles.to_pixels(state.rois, width, height)
+
+            # menus and dialogue boxes repeat: an identical frame reuses its earlier result outright
+            with timer.stage("frame_cache"):
+                frame_key = (frame_hash(grey_image_1_channel), self.engine.dual_pass, paragraphs, tuple(roi_rects))
+                cached_result = self.frame_cache.get(frame_key)
+
+            regions, reused = None, []
+            if cached_result is None:
+                with timer.stage("diff"):
+                    if incremental:
+                        regions, reused = state.incremental.plan(grey_image_1_channel)
+                    else:
+                        state.incremental.reset()
+
+                # restrict OCR to the window's regions of interest, if any
+                if regions is None:
+                    regions = roi_rects or None
+                elif roi_rects:
+                    regions = roi_profiles.intersect(regions, roi_rects)
+
+                if regions is None:
+                    images.append((len(plans), 0, 0, image))
+                else:
+                    images += [(len(plans), x0, y0, image.crop(x0, y0, x1, y1)) for x0, y0, x1, y1 in regions]
+            plans.append((job, state, image, frame_key, cached_result, regions, reused, []))
+
+        results = self.engine.detect_and_recognize_many([image for *_, image in images])
+        for (plan, x0, y0, _), result in zip(images, results):
+            plans[plan][-1].extend(([[x + x0, y + y0] for x, y in box], text, conf) for box, text, conf in result)
+
+        for job, state, image, frame_key, cached_result, regions, reused, fresh in plans:
+            grey = image.grey
+            state.bytes_copied = image.copied
+            if cached_result is not None:
+                entries = [(box, text, conf, None) for box, text, conf in cached_result]
+            else:
+                if regions is not None:
+                    # regions can overlap, drop boxes read twice
+                    with timer.stage("merge"):
+                        fresh = boxes.merge_best_bbox(fresh, [])
+                entries = reused + [(box, text, conf, None) for box, text, conf in fresh]
+                state.layout_stats = {}
+                if paragraphs:
+                    # one segment per paragraph instead of per box for translation and the overlay
+                    with timer.stage("layout"):
+                        segments = len(entries)
+                        entries, furigana = group_paragraphs(entries)
+                    state.layout_stats = {"segments_in": segments, "segments_out": len(entries),
+                                          "furigana": furigana}
+                self.frame_cache.put(frame_key, [(box, text, conf) for box, text, conf, _ in entries])
+            if job.cancelled:
+                # the source is gone, but keep its diff state pointing at the newest grey buffer
+                state.incremental.update(grey, entries)
+                continue
+            self.finish_job(job, state, grey, frame_key, entries, timer, cached_result is not None)
+
+        self.metrics.record(timer.stages)
+
+    def finish_job(self, job, state, grey, frame_key, entries, timer, frame_cache_hit):
+        """
+        Fill in cached translations, emit the frame and its overlay, and translate the rest in the background
+        """
+        self.generation += 1
+        state.generation = self.generation
+        state.current_frame = job.frame
+        state.frame_key = frame_key
+
+        settings = self.settings
+        target_lang = settings["translation/target_lang"]
+        with timer.stage("track"):
+            if settings["ocr/tracking"]:
+                state.tracker.stable_frames = settings["ocr/stable_frames"]
+                entries, stable = state.tracker.update(entries, require_stable=job.live)
+            else:
+                state.tracker.reset()
+                stable = [True] * len(entries)
+        with timer.stage("translate_cache"):
+            missing = [text for _, text, _, translated in entries if translated is None]
+            cached = self.translation_pipeline.cached(missing, target_lang)
+            entries = [(box, text, conf, translated if translated is not None else cached.get(text))
+                       for box, text, conf, translated in entries]
+            state.tracker.set_translations(cached)
+        state.incremental.update(grey, entries)
+        # incremental stats are about the last diff, which a frame cache hit skips
+        stats = {} if frame_cache_hit else state.incremental.stats
+        self.stats_ready.emit({**stats,
+                               "frame_cache": self.frame_cache.stats(),
+                               "crop_cache": self.engine.crop_cache.stats(),
+                               "scheduler": self.scheduler.stats(),
+                               "layout": state.layout_stats,
+                               **({"session": self.recorder.stats()} if self.recorder is not None else {}),
+                               "tracker": {**state.tracker.stats,
+                                           "translations_requested": self.translations_requested},
+                               "memory": {**memory_stats(), "pool": frame_pool.nbytes()},
+                               # host bytes written for this frame: conversions, variants, crops and
+                               # the copy handed to the GUI, against the size of the captured frame
+                               "copies": {"frame": frame_nbytes(job.frame),
+                                          "copied": state.bytes_copied + job.frame.shape[0] * job.frame.shape[1] * 4}})
+
+        with timer.stage("paint"):
+            self.emit_overlay(job.source, state, entries, job.frame)
+
+        # lines still changing between live frames are shown as read and translated once they settle
+        missing = list(dict.fromkeys(text for (_, text, _, translated), settled in zip(entries, stable)
+                                     if settled and translated is None))
+        if missing:
+            self.translations_requested += len(missing)
+            source, generation = job.source, self.generation
+            submitted = time.perf_counter()
+            self.translation_pipeline.submit(
+                missing, target_lang,
+                lambda translations: self.translations_ready.emit(
+                    source, generation, translations, time.perf_counter() - submitted))
+
+    @Slot()
+    def reload_settings(self):
+        """
+        Re-read the cached frame settings and rebuild the translator after settings changed
+        """
+        self.settings = read_frame_settings()
+        self.reload_translator()
+
+    def reload_translator(self):
+        """
+        Rebuild the translator for the current provider and API keys
+        """
+        self.translation_pipeline.shutdown()
+        self.translator = self.build_translator()
+        self.translation_pipeline = TranslationPipeline(self.translator)
+
+    def build_translator(self):
+        """
+        Translator for the configured provider, on the worker's shared translation cache
+        """
+        provider = get_setting("translation/provider")
+        if provider != "Stub" and self.translation_cache is None:
+            self.translation_cache = TranslationCache()
+        return create_translator(provider, cache=self.translation_cache)
+
+    @Slot(object, int, dict, float)
+    def apply_translations(self, source, generation, translations, elapsed):
+        """
+        Update the overlay of the latest frame of source once its background translations arrive;
+        results for frames that were superseded only warm the translator cache
+        """
+        timer = StageTimer()
+        timer.add("translate_network", elapsed)
+        state = self.sources.get(source)
+        if state is not None and translations:
+            state.tracker.set_translations(translations)
+        if state is not None and generation == state.generation and translations:
+            entries = [(box, text, conf, translated if translated is not None else translations.get(text))
+                       for box, text, conf, translated in state.incremental.prev_entries]
+            state.incremental.prev_entries = entries
+            with timer.stage("repaint"):
+                self.emit_overlay(source, state, entries)
+        self.metrics.record(timer.stages)
+
+    def emit_overlay(self, source, state, entries, frame=None):
+        """
+        Emit the overlay items of entries for source, with a copy of frame when the frame is new
+        """
+        items = overlay_items(entries)
+        if frame is not None:
+            # the capture buffer gets reused; the GUI gets a pooled copy that is handed out
+            # again once it has converted it
+            height, width = frame.shape[:2]
+            copy = frame_pool.acquire(width, height, 4)
+            np.copyto(copy, frame)
+            frame = copy
+        recorder = self.session_recorder()
+        if recorder is not None:
+            recorder.record(source, frame, entries)
+        self.result_ready.emit(source, state.frame_key, frame, items)
+
+    def session_recorder(self):
+        """
+        The SessionWriter recording what is shown while session/record is on, else None
+        """
+        if not self.settings["session/record"]:
+            if self.recorder is not None:
+                self.recorder.close()
+                self.recorder = None
+            return None
+        if self.recorder is None:
+            directory = (self.settings["session/directory"]
+                         or os.path.join(data_dir(), "sessions", time.strftime("%Y%m%d-%H%M%S")))
+            self.recorder = SessionWriter(directory)
+        return self.recorder
+
+    def shutdown(self):
+        self.translation_pipeline.shutdown()
+        if self.translation_cache is not None:
+            self.translation_cache.close()
+            self.translation_cache = None
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
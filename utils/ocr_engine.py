@@ -0,0 +1,311 @@
+import bisect
+import math
+import os
+from collections import deque
+import cv2
+import numpy as np
+from . import boxes
+from .buffers import ConversionBuffers
+from .metrics import StageTimer
+from .result_cache import LRUCache, CROP_CACHE_ENTRIES, content_hash
+from .preprocess import PreparedImage, CPUPreprocessor, DevicePreprocessor, detector_input
+
+# inference backends: EasyOCR's torch models, or ONNX Runtime over exports of them
+BACKEND_TORCH = "torch"
+BACKEND_ONNX = "onnx"
+BACKENDS = (BACKEND_TORCH, BACKEND_ONNX)
+# height of the blank strip between stacked recognition variants
+VARIANT_GAP = 16
+# adaptive resolution: detect at a scale where the smaller text of recent frames is about
+# this many pixels tall, never below MIN_DETECT_SCALE and never upscaling
+DETECT_TEXT_HEIGHT = 20
+MIN_DETECT_SCALE = 0.25
+# recent box heights considered, and how many before they override the configured long side
+TEXT_HEIGHT_HISTORY = 256
+MIN_TEXT_HEIGHT_SAMPLES = 8
+# percentile of recent box heights treated as "the smaller text"
+TEXT_HEIGHT_PERCENTILE = 25
+# boxes no larger than this many full-resolution pixels are dropped (EasyOCR's min_size)
+MIN_BOX_SIZE = 20
+
+
+class OCREngine:
+    """
+    EasyOCR detection + recognition without any Qt dependency, shared by the GUI worker
+    and the headless batch command
+
+    dual_pass runs full readtext() on the colour and the grey frame; otherwise detection
+    runs once and recognition covers both greyscale variants in one batch.
+
+    adaptive runs detection on a downscaled frame (long side detect_long_side until enough
+    text has been seen, then scaled from recent text heights) and recognizes full-resolution crops.
+
+    gpu_preprocess (CUDA + CRAFT only) converts frames on the GPU and feeds the detector from
+    the uploaded frame; everywhere else the cv2 / EasyOCR CPU path is used.
+
+    backend "torch" runs EasyOCR's own models, "onnx" runs exports of them in ONNX Runtime
+    (see onnx_backend). quantize uses int8 weights on CPU: EasyOCR's dynamic quantization of
+    the torch models, or a quantized recognizer for onnx. threads > 0 sets the CPU inference
+    threads. languages picks the recognition model; a Latin-only set loads a smaller one.
+    """
+    def __init__(self, languages=("ja", "en"), gpu=None, dual_pass=False, adaptive=False, detect_long_side=1280,
+                 gpu_preprocess=True, backend=BACKEND_TORCH, quantize=True, threads=0):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown OCR backend: {backend}")
+        # torch / EasyOCR take seconds to import; only pay for it once a model is actually built
+        import easyocr
+        import torch
+        if threads > 0:
+            torch.set_num_threads(threads)
+        if gpu is None:
+            gpu = torch.cuda.is_available()
+        # the onnx export is taken from the fp32 models
+        self.reader = easyocr.Reader(list(languages), gpu=gpu,
+                                     quantize=quantize and backend == BACKEND_TORCH)
+        self.backend = backend
+        if backend == BACKEND_ONNX:
+            from .onnx_backend import use_onnx
+            use_onnx(self.reader, os.path.join(self.reader.model_storage_directory, "onnx"),
+                     quantize=quantize, threads=threads, gpu=gpu)
+        self.gpu_preprocess = (gpu_preprocess and backend == BACKEND_TORCH and torch.cuda.is_available()
+                               and str(self.reader.device).startswith("cuda")
+                               and getattr(self.reader, "detect_network", "craft") == "craft")
+        self.dual_pass = dual_pass
+        self.adaptive = adaptive
+        self.detect_long_side = detect_long_side
+        # full-resolution heights of recently detected horizontal boxes
+        self.text_heights = deque(maxlen=TEXT_HEIGHT_HISTORY)
+        self.buffers = ConversionBuffers()
+        # per-stage timings of the current frame, replaced by the caller per frame
+        self.timer = StageTimer()
+        # (text, conf) of horizontal text crops already read, keyed by their pixels
+        self.crop_cache = LRUCache(CROP_CACHE_ENTRIES)
+
+    def warm_up(self):
+        """
+        One throwaway inference on a small synthetic frame so the first real OCR
+        doesn't pay for CUDA context and kernel initialization
+        """
+        image = np.full((96, 320, 3), 255, dtype=np.uint8)
+        cv2.putText(image, "Warm up 123", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+        grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        self.reader.detect(image, text_threshold=0.5)
+        # recognize the whole frame as one box so the recognizer runs even if detection finds nothing
+        self.reader.recognize(grey, [[0, image.shape[1], 0, image.shape[0]]], [],
+                              decoder='greedy',
+                              batch_size=16,
+                              detail=1)
+
+    def detect_scale(self, image):
+        """
+        Downscale factor for detection on image (1.0 = full resolution)
+        """
+        if not self.adaptive:
+            return 1.0
+        if len(self.text_heights) >= MIN_TEXT_HEIGHT_SAMPLES:
+            text_height = np.percentile(self.text_heights, TEXT_HEIGHT_PERCENTILE)
+            scale = DETECT_TEXT_HEIGHT / max(text_height, 1)
+        else:
+            scale = self.detect_long_side / max(image.shape[:2])
+        return min(1.0, max(MIN_DETECT_SCALE, scale))
+
+    def preprocessor(self):
+        """
+        New per-source frame preprocessor for the configured path
+        """
+        return DevicePreprocessor(self.reader.device) if self.gpu_preprocess else CPUPreprocessor()
+
+    def detect(self, image):
+        """
+        CRAFT detection on one BGR image (or PreparedImage), on a downscaled copy in adaptive mode.
+        Returns (horizontal_list, free_list) in image coordinates.
+        """
+        scale = self.detect_scale(image)
+        if isinstance(image, PreparedImage):
+            if image.device is not None:
+                horizontal_list, free_list = self.detect_on_device(image.device, scale)
+                if self.adaptive:
+                    self.text_heights.extend(y1 - y0 for _, _, y0, y1 in horizontal_list)
+                return horizontal_list, free_list
+            image = image.bgr
+        if scale < 1.0:
+            height, width = image.shape[:2]
+            small = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+            # the size filter runs on the downscaled frame, so scale it too; otherwise short
+            # tokens (HUD numbers, single glyphs) at the target text height are dropped
+            horizontal_list, free_list = self.reader.detect(small, text_threshold=0.5,
+                                                            min_size=max(1, int(MIN_BOX_SIZE * scale)))
+            # map back up, rounding outwards so the full-resolution crops keep the glyph edges
+            horizontal_list = [[math.floor(x0 / scale), math.ceil(x1 / scale),
+                                math.floor(y0 / scale), math.ceil(y1 / scale)]
+                               for x0, x1, y0, y1 in horizontal_list[0]]
+            free_list = [[[x / scale, y / scale] for x, y in poly] for poly in free_list[0]]
+        else:
+            horizontal_list, free_list = self.reader.detect(image, text_threshold=0.5, min_size=MIN_BOX_SIZE)
+            horizontal_list, free_list = horizontal_list[0], free_list[0]
+        if self.adaptive:
+            self.text_heights.extend(y1 - y0 for _, _, y0, y1 in horizontal_list)
+        return horizontal_list, free_list
+
+    def detect_on_device(self, bgr, scale, min_size=MIN_BOX_SIZE):
+        """
+        reader.detect() for a BGR tensor already on the GPU: EasyOCR's CRAFT pre- and
+        post-processing with its default thresholds (text_threshold 0.5 as elsewhere).
+        Boxes come back in full-resolution coordinates whatever the detection scale, so
+        min_size is in full-resolution pixels here.
+        """
+        import torch
+        from easyocr.craft_utils import getDetBoxes, adjustResultCoordinates
+        from easyocr.utils import group_text_box, diff
+
+        x, ratio = detector_input(bgr, scale)
+        with torch.no_grad():
+            y, _ = self.reader.detector(x)
+        score_text = y[0, :, :, 0].cpu().numpy()
+        score_link = y[0, :, :, 1].cpu().numpy()
+        boxes, polys = getDetBoxes(score_text, score_link, 0.5, 0.4, 0.4, False)[:2]
+        boxes = adjustResultCoordinates(boxes, ratio, ratio)
+        polys = adjustResultCoordinates(polys, ratio, ratio)
+        text_box = [np.array(box if poly is None else poly).astype(np.int32).reshape(-1)
+                    for box, poly in zip(boxes, polys)]
+
+        horizontal_list, free_list = group_text_box(text_box, 0.1, 0.5, 0.5, 0.5, 0.1, True)
+        horizontal_list = [i for i in horizontal_list if max(i[1] - i[0], i[3] - i[2]) > min_size]
+        free_list = [i for i in free_list
+                     if max(diff([c[0] for c in i]), diff([c[1] for c in i])) > min_size]
+        return horizontal_list, free_list
+
+    def ocr_image(self, image):
+        """
+        OCR a whole BGR image, returning merged (box, text, conf) results
+        """
+        grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        return self.detect_and_recognize(image, grey)
+
+    def run(self, image, variant="colour"):
+        """
+        Full OCR of one BGR image; readtext() split into its detect and recognize
+        halves so each can be timed
+        """
+        with self.timer.stage(f"detect_{variant}"):
+            horizontal_list, free_list = self.detect(image)
+        with self.timer.stage(f"recognize_{variant}"):
+            result = self.reader.recognize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY),
+                                           horizontal_list, free_list,
+                                           decoder='greedy',
+                                           batch_size=16,
+                                           detail=1)
+        return result
+
+    def run_single_pass(self, image, variants):
+        """
+        Run CRAFT detection once on image, then recognize every detected box on
+        each greyscale variant in one batched recognizer call.
+        Returns one (box, text, conf) per detected box, keeping the best-confidence reading.
+        """
+        return self.run_single_pass_many([(image, variants)])[0]
+
+    def run_single_pass_many(self, items):
+        """
+        run_single_pass for several (image, variants) items, with the recognition of all
+        of them in a single recognizer call.
+        Horizontal boxes whose crops were read before are answered from crop_cache.
+        """
+        with self.timer.stage("detect"):
+            detections = [self.detect(image) for image, _ in items]
+
+        best = [{} for _ in items]
+        crop_keys = [{} for _ in items]
+        # (item index, variant, horizontal boxes, free boxes) still to recognize
+        parts = []
+        for i, ((_, variants), (horizontal_list, free_list)) in enumerate(zip(items, detections)):
+            # clamp to the frame up front so recognize() returns identical boxes for every variant
+            height, width = variants[0].shape[:2]
+            unread = []
+            for x0, x1, y0, y1 in horizontal_list:
+                x0, x1, y0, y1 = max(0, x0), min(x1, width), max(0, y0), min(y1, height)
+                box = [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+                crop_key = content_hash(*(v[y0:y1, x0:x1] for v in variants))
+                reading = self.crop_cache.get(crop_key)
+                if reading is None:
+                    crop_keys[i][tuple(map(tuple, box))] = crop_key
+                    unread.append([x0, x1, y0, y1])
+                else:
+                    best[i][tuple(map(tuple, box))] = (box, *reading)
+            if unread or free_list:
+                parts += [(i, v, unread, free_list) for v in variants]
+        if not parts:
+            return [list(b.values()) for b in best]
+
+        # stack every variant of every item vertically (with a blank strip so crops can't bleed
+        # across) and shift the boxes into place so a single recognize() covers them all
+        width = max(v.shape[1] for _, v, _, _ in parts)
+        gap = np.zeros((VARIANT_GAP, width), dtype=np.uint8)
+        blocks = []
+        offsets = []
+        stacked_horizontal = []
+        stacked_free = []
+        offset = 0
+        for _, v, horizontal_list, free_list in parts:
+            if v.shape[1] < width:
+                v = np.pad(v, ((0, 0), (0, width - v.shape[1])))
+            blocks += [v, gap]
+            offsets.append(offset)
+            stacked_horizontal += [[x0, x1, y0 + offset, y1 + offset] for x0, x1, y0, y1 in horizontal_list]
+            stacked_free += [[[x, y + offset] for x, y in poly] for poly in free_list]
+            offset += v.shape[0] + VARIANT_GAP
+        stacked = np.vstack(blocks[:-1])
+
+        with self.timer.stage("recognize"):
+            result = self.reader.recognize(stacked, stacked_horizontal, stacked_free,
+                                           decoder='greedy',
+                                           batch_size=16,
+                                           detail=1)
+
+        fresh = [{} for _ in items]
+        for box, text, conf in result:
+            center_y = (min(p[1] for p in box) + max(p[1] for p in box)) / 2
+            part = bisect.bisect_right(offsets, center_y) - 1
+            i, offset = parts[part][0], offsets[part]
+            box = [[int(x), int(y) - offset] for x, y in box]
+            key = tuple(map(tuple, box))
+            if key not in fresh[i] or conf > fresh[i][key][2]:
+                fresh[i][key] = (box, text, conf)
+        for i, readings in enumerate(fresh):
+            for key, (box, text, conf) in readings.items():
+                if key in crop_keys[i]:
+                    self.crop_cache.put(crop_keys[i][key], (text, conf))
+            best[i].update(readings)
+        return [list(b.values()) for b in best]
+
+    def detect_and_recognize(self, ocr_image, grey_image):
+        """
+        OCR a BGR image (and its greyscale version) with the configured pass mode
+        """
+        if self.dual_pass:
+            original_results = self.run(ocr_image)
+            grey_results = self.run(cv2.cvtColor(grey_image, cv2.COLOR_GRAY2BGR), variant="grey")
+        else:
+            # luma variant plus a max-channel variant that keeps saturated coloured text contrasted
+            variants = [grey_image, self.buffers.channel_max(ocr_image)]
+            original_results = self.run_single_pass(ocr_image, variants)
+            grey_results = []
+
+        with self.timer.stage("merge"):
+            return boxes.merge_best_bbox(original_results, grey_results)
+
+    def detect_and_recognize_many(self, images):
+        """
+        OCR several PreparedImages (or (BGR, grey) pairs); in single-pass mode all of them
+        share one recognizer call
+        """
+        images = [image if isinstance(image, PreparedImage) else PreparedImage(image[1], image[0])
+                  for image in images]
+        if self.dual_pass:
+            return [self.detect_and_recognize(image.bgr, image.grey) for image in images]
+        items = [(image, [image.grey, image.channel_max]) for image in images]
+        results = self.run_single_pass_many(items)
+        with self.timer.stage("merge"):
+            return [boxes.merge_best_bbox(result, []) for result in results]
+
@@ -0,0 +1,142 @@
+import threading
+import time
+
+# queued frames older than this are dropped instead of OCR'd
+MAX_JOB_AGE = 2.0
+# most sources OCR'd together when cross-source batching is on
+MAX_BATCH = 4
+
+
+class OCRJob:
+    """
+    One frame of one source waiting for (or going through) OCR; live frames come from
+    continuous capture, others are single screenshots
+    """
+    def __init__(self, source, frame, seq=0, live=False):
+        self.source = source
+        self.frame = frame
+        self.seq = seq
+        self.live = live
+        self.submitted = time.perf_counter()
+        self.cancelled = False
+
+
+class OCRScheduler:
+    """
+    Job queue in front of the OCR worker.
+
+    Each source (captured window) holds at most one queued frame: a newer frame replaces
+    the queued one (latest frame wins). The focused source is served first, then the
+    others oldest first. Frames that waited longer than max_age are dropped, and
+    cancel() drops a source's queued frame and marks its running job so the worker
+    discards the result.
+
+    Thread-safe: the GUI submits, the worker thread takes. submit() returns True when
+    the caller has to wake the worker; at most one wake-up is outstanding at a time.
+    """
+    def __init__(self, max_age=MAX_JOB_AGE, max_batch=MAX_BATCH):
+        self.max_age = max_age
+        self.max_batch = max_batch
+        # take several sources per call (cross-source batching)
+        self.batching = False
+        self.focus = None
+        self._pending = {}
+        self._running = []
+        self._seq = 0
+        self._wake_posted = False
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.coalesced = 0
+        self.expired = 0
+        self.cancelled = 0
+        self.completed = 0
+
+    def submit(self, source, frame, live=False):
+        """
+        Queue frame for source, replacing its queued frame if any
+        """
+        with self._lock:
+            self._seq += 1
+            self.submitted += 1
+            previous = self._pending.pop(source, None)
+            if previous is not None:
+                previous.cancelled = True
+                self.coalesced += 1
+            self._pending[source] = OCRJob(source, frame, self._seq, live)
+            return self._post_wake()
+
+    def _post_wake(self):
+        if self._wake_posted or not self._pending:
+            return False
+        self._wake_posted = True
+        return True
+
+    def set_focus(self, source):
+        with self._lock:
+            self.focus = source
+
+    def cancel(self, source):
+        """
+        Drop the queued frame of source and discard the result of its running job
+        """
+        with self._lock:
+            job = self._pending.pop(source, None)
+            if job is not None:
+                job.cancelled = True
+                self.cancelled += 1
+            for job in self._running:
+                if job.source == source and not job.cancelled:
+                    job.cancelled = True
+                    self.cancelled += 1
+
+    def clear(self):
+        """
+        Cancel every queued frame
+        """
+        with self._lock:
+            for job in self._pending.values():
+                job.cancelled = True
+            self.cancelled += len(self._pending)
+            self._pending.clear()
+            self._wake_posted = False
+
+    def take(self):
+        """
+        Next jobs to run: the most urgent one, plus others when batching is on
+        """
+        with self._lock:
+            self._wake_posted = False
+            now = time.perf_counter()
+            for source, job in list(self._pending.items()):
+                if now - job.submitted > self.max_age:
+                    job.cancelled = True
+                    del self._pending[source]
+                    self.expired += 1
+            order = sorted(self._pending.values(), key=lambda job: (job.source != self.focus, job.submitted))
+            jobs = order[:self.max_batch if self.batching else 1]
+            for job in jobs:
+                del self._pending[job.source]
+            self._running = jobs
+            return jobs
+
+    def done(self, jobs):
+        """
+        Mark jobs finished; returns True when more work is queued and the worker should wake itself
+        """
+        with self._lock:
+            self.completed += sum(not job.cancelled for job in jobs)
+            self._running = []
+            return self._post_wake()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self):
+        with self._lock:
+            return {"submitted": self.submitted,
+                    "coalesced": self.coalesced,
+                    "expired": self.expired,
+                    "cancelled": self.cancelled,
+                    "completed": self.completed,
+                    "pending": len(self._pending)}
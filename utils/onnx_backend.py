@@ -0,0 +1,127 @@
+import os
+import numpy as np
+
+# ONNX opset the detector and recognizer are exported with
+OPSET = 17
+# example input sizes for export; height and width (and batch) stay dynamic
+DETECTOR_EXAMPLE = (1, 3, 640, 640)
+RECOGNIZER_EXAMPLE = (1, 1, 64, 256)
+
+
+class ONNXDetector:
+    """
+    Stand-in for EasyOCR's CRAFT module running the exported detector in ONNX Runtime.
+    Called like the torch module (x -> (score maps, feature)); EasyOCR only reads the
+    score maps, so no feature is returned.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.input = session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, x):
+        import torch
+        y = self.session.run(["y"], {self.input: x.detach().cpu().numpy().astype(np.float32, copy=False)})[0]
+        return torch.from_numpy(y), None
+
+
+class ONNXRecognizer:
+    """
+    Stand-in for EasyOCR's recognition model running the exported recognizer in ONNX
+    Runtime. Called like the torch module (image, text -> logits); CTC models ignore text.
+    """
+    def __init__(self, session):
+        self.session = session
+        self.input = session.get_inputs()[0].name
+
+    def eval(self):
+        return self
+
+    def __call__(self, image, text=None):
+        import torch
+        preds = self.session.run(None, {self.input: image.detach().cpu().numpy().astype(np.float32, copy=False)})[0]
+        return torch.from_numpy(preds)
+
+
+def _export(module, example, path, input_name, output_names, dynamic_axes):
+    import torch
+    tmp = path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(module, example, tmp, opset_version=OPSET, input_names=[input_name],
+                          output_names=output_names, dynamic_axes=dynamic_axes)
+    os.replace(tmp, path)
+
+
+def _quantize(path):
+    """
+    int8 weights (dynamic quantization) next to path; returns the quantized model's path
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    quantized = path.replace(".onnx", ".int8.onnx")
+    if not os.path.exists(quantized):
+        quantize_dynamic(path, quantized, weight_type=QuantType.QInt8)
+    return quantized
+
+
+def export_models(reader, directory):
+    """
+    Export reader's (fp32) detector and recognizer to ONNX in directory, once per model.
+    Returns (detector path, recognizer path)
+    """
+    import torch
+    os.makedirs(directory, exist_ok=True)
+    detector_path = os.path.join(directory, f"{getattr(reader, 'detect_network', 'craft')}.onnx")
+    recognizer_path = os.path.join(directory, f"{reader.recog_network}.onnx")
+
+    if not os.path.exists(detector_path):
+        # on CUDA EasyOCR wraps its models in DataParallel
+        detector = getattr(reader.detector, "module", reader.detector)
+        device = next(detector.parameters()).device
+        _export(detector, torch.zeros(DETECTOR_EXAMPLE, device=device), detector_path, "x", ["y", "feature"],
+                {"x": {0: "batch", 2: "height", 3: "width"},
+                 "y": {0: "batch", 1: "height", 2: "width"}})
+
+    if not os.path.exists(recognizer_path):
+        model = getattr(reader.recognizer, "module", reader.recognizer)
+        device = next(model.parameters()).device
+
+        class Recognizer(torch.nn.Module):
+            # the text argument is only used by attention decoders, not EasyOCR's CTC models
+            def __init__(self):
+                super().__init__()
+                self.model = model
+
+            def forward(self, image):
+                return self.model(image, None)
+
+        _export(Recognizer().eval(), torch.zeros(RECOGNIZER_EXAMPLE, device=device), recognizer_path,
+                "image", ["preds"], {"image": {0: "batch", 3: "width"},
+                                     "preds": {0: "batch", 1: "length"}})
+    return detector_path, recognizer_path
+
+
+def use_onnx(reader, directory, quantize=False, threads=0, gpu=False):
+    """
+    Swap reader's detector and recognizer for ONNX Runtime sessions over exports of its
+    own models, so detect() / recognize() / readtext() keep working unchanged.
+    quantize runs the recognizer with int8 weights; threads > 0 sizes each session's
+    intra-op pool. Requires the optional onnxruntime package.
+    """
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError("The onnx OCR backend needs the onnxruntime package (pip install onnxruntime)")
+    detector_path, recognizer_path = export_models(reader, directory)
+    if quantize:
+        recognizer_path = _quantize(recognizer_path)
+
+    options = onnxruntime.SessionOptions()
+    if threads > 0:
+        options.intra_op_num_threads = threads
+    providers = ["CPUExecutionProvider"]
+    if gpu and "CUDAExecutionProvider" in onnxruntime.get_available_providers():
+        providers.insert(0, "CUDAExecutionProvider")
+    reader.detector = ONNXDetector(onnxruntime.InferenceSession(detector_path, options, providers=providers))
+    reader.recognizer = ONNXRecognizer(onnxruntime.InferenceSession(recognizer_path, options, providers=providers))
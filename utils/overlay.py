@@ -0,0 +1,28 @@
+# item styles: a translated line, or a line shown in its source text while the translation is pending
+STYLE_TRANSLATED = "translated"
+STYLE_SOURCE = "source"
+
+
+class OverlayItem:
+    """
+    One line painted over the frame: rect (x, y, w, h) in frame pixels, the text shown and its style
+    """
+    def __init__(self, rect, text, style=STYLE_TRANSLATED):
+        self.rect = rect
+        self.text = text
+        self.style = style
+
+
+def overlay_items(entries):
+    """
+    Overlay items for (box, text, conf, translated) entries; untranslated lines show their source text
+    """
+    items = []
+    for box, text, _, translated in entries:
+        x, y = map(int, box[0])
+        x1, y1 = map(int, box[2])
+        if translated is None:
+            items.append(OverlayItem((x, y, x1 - x, y1 - y), text, STYLE_SOURCE))
+        else:
+            items.append(OverlayItem((x, y, x1 - x, y1 - y), translated, STYLE_TRANSLATED))
+    return items
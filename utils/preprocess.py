@@ -0,0 +1,167 @@
+import numpy as np
+from .buffers import ConversionBuffers
+
+# EasyOCR's CRAFT input: long side capped at CANVAS_SIZE, padded to a multiple of 32,
+# normalized with the ImageNet mean / std
+CANVAS_SIZE = 2560
+MEAN = (0.485, 0.456, 0.406)
+VARIANCE = (0.229, 0.224, 0.225)
+# OpenCV's fixed-point BGR -> grey weights for 8-bit images (B, G, R, shift), so the device
+# grey matches cv2.cvtColor bit for bit
+GREY_WEIGHTS = (3735, 19235, 9798)
+GREY_SHIFT = 15
+
+
+class PreparedImage:
+    """
+    An image ready for OCR: the greyscale frame the recognizer reads, plus the BGR frame and
+    its max-channel variant, produced on first use.
+
+    device is the BGR uint8 (H, W, 3) tensor on the GPU when preprocessing runs there;
+    detection then reads it directly and bgr is only downloaded if something asks for it.
+
+    copied counts the bytes of host arrays written for this frame: its conversions,
+    downloads, variants and crops (crops count towards the image they were cut from).
+    """
+    def __init__(self, grey, bgr=None, device=None, buffers=None, copied=0):
+        self.grey = grey
+        self.device = device
+        self._bgr = bgr
+        self._channel_max = None
+        self._buffers = buffers
+        self._parent = None
+        self.copied = copied
+
+    def _count(self, array):
+        root = self if self._parent is None else self._parent
+        root.copied += array.nbytes
+        return array
+
+    @property
+    def shape(self):
+        return self.grey.shape
+
+    @property
+    def bgr(self):
+        if self._bgr is None:
+            self._bgr = self._count(self.device.cpu().numpy())
+        return self._bgr
+
+    @property
+    def channel_max(self):
+        if self._channel_max is None:
+            if self.device is not None:
+                self._channel_max = self._count(self.device.amax(dim=2).cpu().numpy())
+            elif self._buffers is not None:
+                self._channel_max = self._count(self._buffers.channel_max(self._bgr))
+            else:
+                self._channel_max = self._count(self._bgr.max(axis=2))
+        return self._channel_max
+
+    def crop(self, x0, y0, x1, y1):
+        """
+        (x0, y0, x1, y1) part of the image; host arrays are copied, the device tensor is sliced
+        """
+        crop = PreparedImage(np.ascontiguousarray(self.grey[y0:y1, x0:x1]),
+                             None if self._bgr is None else np.ascontiguousarray(self._bgr[y0:y1, x0:x1]),
+                             None if self.device is None else self.device[y0:y1, x0:x1])
+        crop._parent = self if self._parent is None else self._parent
+        for array in (crop.grey, crop._bgr):
+            if array is not None:
+                crop._count(array)
+        if self._channel_max is not None:
+            crop._channel_max = crop._count(np.ascontiguousarray(self._channel_max[y0:y1, x0:x1]))
+        return crop
+
+
+class CPUPreprocessor:
+    """
+    cv2 conversions into reused buffers; detection input is built by EasyOCR itself.
+    This is the reference path the device path has to match.
+    """
+    device = None
+
+    def __init__(self):
+        self.buffers = ConversionBuffers()
+
+    def prepare(self, frame):
+        bgr, grey = self.buffers.convert(frame)
+        return PreparedImage(grey, bgr, buffers=self.buffers, copied=bgr.nbytes + grey.nbytes)
+
+
+class DevicePreprocessor:
+    """
+    Uploads each BGRA frame to the GPU once and converts it there. Only the greyscale
+    image the recognizer, the caches and the incremental diff read comes back to the host,
+    into two alternating pinned buffers (incremental OCR keeps the previous one).
+    """
+    def __init__(self, device="cuda"):
+        import torch
+        self.torch = torch
+        self.device = torch.device(device)
+        self._size = None
+        self._upload = None
+        self._grey = [None, None]
+        self._turn = 0
+
+    def _ensure(self, height, width):
+        if self._size == (height, width):
+            return
+        torch = self.torch
+        self._size = (height, width)
+        self._upload = torch.empty((height, width, 4), dtype=torch.uint8, pin_memory=True)
+        self._grey = [torch.empty((height, width), dtype=torch.uint8, pin_memory=True) for _ in range(2)]
+
+    def prepare(self, frame):
+        torch = self.torch
+        height, width = frame.shape[:2]
+        self._ensure(height, width)
+        # the capture view may have padded rows: one copy into pinned memory, one upload
+        np.copyto(self._upload.numpy(), frame)
+        bgra = self._upload.to(self.device, non_blocking=True)
+        bgr = bgra[..., :3]
+
+        b, g, r = (bgra[..., i].to(torch.int32) for i in range(3))
+        grey = (b * GREY_WEIGHTS[0] + g * GREY_WEIGHTS[1] + r * GREY_WEIGHTS[2]
+                + (1 << (GREY_SHIFT - 1))) >> GREY_SHIFT
+        self._turn ^= 1
+        host_grey = self._grey[self._turn]
+        host_grey.copy_(grey.to(torch.uint8))
+        # the pinned upload copy and the grey download
+        return PreparedImage(host_grey.numpy(), device=bgr,
+                             copied=self._upload.numel() + host_grey.numel())
+
+
+def detector_input(bgr, scale=1.0, canvas_size=CANVAS_SIZE):
+    """
+    EasyOCR's resize_aspect_ratio + normalizeMeanVariance on the device for a BGR uint8
+    (H, W, 3) tensor, after an optional downscale by scale.
+    Returns (1x3xHxW float tensor, factor mapping detector input coordinates back to bgr)
+    """
+    import torch
+    import torch.nn.functional as F
+
+    height, width = bgr.shape[:2]
+    target_h, target_w = max(1, round(height * scale)), max(1, round(width * scale))
+    # EasyOCR caps the long side at the canvas size (mag_ratio 1)
+    ratio = min(1.0, canvas_size / max(target_h, target_w))
+    target_h, target_w = int(target_h * ratio), int(target_w * ratio)
+
+    x = bgr.permute(2, 0, 1).unsqueeze(0).float()
+    if (target_h, target_w) != (height, width):
+        # area averaging for the adaptive downscale (cv2.INTER_AREA), bilinear otherwise (cv2.INTER_LINEAR)
+        mode = "area" if scale < 1.0 else "bilinear"
+        x = F.interpolate(x, size=(target_h, target_w), mode=mode,
+                          **({} if mode == "area" else {"align_corners": False}))
+        x = x.round().clamp(0, 255)
+
+    mean = torch.tensor(MEAN, device=x.device).view(1, 3, 1, 1) * 255.0
+    std = torch.tensor(VARIANCE, device=x.device).view(1, 3, 1, 1) * 255.0
+    x = (x - mean) / std
+    # zero padding to multiples of 32 happens before normalization in EasyOCR
+    pad_h, pad_w = -target_h % 32, -target_w % 32
+    if pad_h or pad_w:
+        padding = ((0 - mean) / std).expand(1, 3, target_h + pad_h, target_w + pad_w).clone()
+        padding[:, :, :target_h, :target_w] = x
+        x = padding
+    return x.contiguous(), max(height, width) / max(target_h, target_w)
@@ -0,0 +1,70 @@
+import hashlib
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+# whole frames are hashed at 1/FRAME_HASH_SCALE resolution
+FRAME_HASH_SCALE = 4
+# OCR results of this many distinct frames are kept
+FRAME_CACHE_ENTRIES = 64
+# recognizer readings of this many distinct text crops are kept
+CROP_CACHE_ENTRIES = 4096
+
+
+def content_hash(*arrays):
+    """
+    128-bit digest of the shapes and pixels of arrays (views are fine)
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for array in arrays:
+        digest.update(repr(array.shape).encode())
+        digest.update(np.ascontiguousarray(array).data)
+    return digest.digest()
+
+
+def frame_hash(grey, scale=FRAME_HASH_SCALE):
+    """
+    Hash of a greyscale frame after an area downscale; cheap on large frames while any
+    glyph-sized change still alters the downscaled pixels
+    """
+    height, width = grey.shape
+    small = cv2.resize(grey, (max(1, width // scale), max(1, height // scale)), interpolation=cv2.INTER_AREA)
+    return (height, width, content_hash(small))
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used mapping that counts its hits and misses
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Cached value for key, or None
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries)}
@@ -0,0 +1,59 @@
+import json
+from .settings import get_setting, set_setting
+
+# ROIs are stored as fractions of the frame (x0, y0, x1, y1) so they survive window resizes,
+# keyed by the window's profile key (WindowRegistry.profile_key) so they survive title changes
+
+
+def _load():
+    return json.loads(get_setting("roi/profiles"))
+
+def get_rois(key: str):
+    return [tuple(roi) for roi in _load().get(key, [])]
+
+def set_rois(key: str, rois):
+    profiles = _load()
+    if rois:
+        profiles[key] = [list(roi) for roi in rois]
+    else:
+        profiles.pop(key, None)
+    set_setting("roi/profiles", json.dumps(profiles))
+
+def add_roi(key: str, roi):
+    set_rois(key, get_rois(key) + [tuple(roi)])
+
+def clear_rois(key: str):
+    set_rois(key, [])
+
+def migrate(title: str, key: str):
+    """
+    Move a profile saved under a window title (before profiles had stable keys) to key
+    """
+    profiles = _load()
+    if title in profiles and key not in profiles and title != key:
+        profiles[key] = profiles.pop(title)
+        set_setting("roi/profiles", json.dumps(profiles))
+
+def to_pixels(rois, width, height):
+    """
+    Normalized ROIs to integer pixel rectangles clipped to the frame, dropping empty ones
+    """
+    rects = []
+    for x0, y0, x1, y1 in rois:
+        rect = (max(0, int(x0 * width)), max(0, int(y0 * height)),
+                min(width, int(round(x1 * width))), min(height, int(round(y1 * height))))
+        if rect[2] > rect[0] and rect[3] > rect[1]:
+            rects.append(rect)
+    return rects
+
+def intersect(regions, rects):
+    """
+    Pairwise intersections of two lists of pixel rectangles
+    """
+    out = []
+    for ax0, ay0, ax1, ay1 in regions:
+        for bx0, by0, bx1, by1 in rects:
+            x0, y0, x1, y1 = max(ax0, bx0), max(ay0, by0), min(ax1, bx1), min(ay1, by1)
+            if x1 > x0 and y1 > y0:
+                out.append((x0, y0, x1, y1))
+    return out
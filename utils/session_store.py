@@ -0,0 +1,300 @@
+import argparse
+import json
+import logging
+import mmap
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+from .frame_source import FrameSource
+from .overlay import overlay_items
+from .result_cache import LRUCache, content_hash
+
+FRAMES_FILE = "frames.bin"
+INDEX_FILE = "session.sqlite3"
+# frames waiting for compression; past this the writer drops records instead of stalling OCR
+MAX_PENDING = 16
+# PNG compression level: fast, still lossless (0-9)
+PNG_COMPRESSION = 1
+# decoded frames kept by a reader, for scrubbing back and forth
+DECODED_FRAMES = 8
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS frames (
+        id INTEGER PRIMARY KEY,
+        hash BLOB NOT NULL UNIQUE,
+        offset INTEGER NOT NULL,
+        length INTEGER NOT NULL,
+        width INTEGER NOT NULL,
+        height INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS records (
+        id INTEGER PRIMARY KEY,
+        time REAL NOT NULL,
+        source TEXT NOT NULL,
+        frame_id INTEGER NOT NULL REFERENCES frames (id),
+        entries TEXT NOT NULL,
+        texts TEXT NOT NULL
+    );
+"""
+
+
+class SessionWriter:
+    """
+    Append-only recording of a capture session: every frame shown with its OCR entries
+    and translations.
+
+    Frames are PNG-compressed and stored once per distinct content (hash) in frames.bin;
+    records (time, source, frame, entries) and the frame index go to a SQLite file next to
+    it. Compression and writes run on a background thread so recording never blocks OCR.
+    """
+    def __init__(self, directory, max_pending=MAX_PENDING):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._last_frame = {}
+        self.records = 0
+        self.frames = 0
+        self.duplicates = 0
+        self.dropped = 0
+        self.failed = 0
+        self.bytes = 0
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, source, frame, entries, timestamp=None):
+        """
+        Queue a record of (box, text, conf, translated) entries shown over frame; frame None
+        means the source's previous frame (e.g. translations arriving later).
+        Returns False when the writer is behind and the record was dropped.
+        """
+        item = (time.time() if timestamp is None else timestamp, source, frame,
+                [([[int(x), int(y)] for x, y in box], text, float(conf), translated)
+                 for box, text, conf, translated in entries])
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self):
+        db = sqlite3.connect(os.path.join(self.directory, INDEX_FILE))
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(SCHEMA)
+        with open(os.path.join(self.directory, FRAMES_FILE), "ab") as blobs:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                try:
+                    self._write(db, blobs, *item)
+                except Exception:
+                    self.failed += 1
+                    log.exception("session recording failed")
+        db.close()
+
+    def _write(self, db, blobs, timestamp, source, frame, entries):
+        source = str(source)
+        if frame is None:
+            frame_id = self._last_frame.get(source)
+            if frame_id is None:
+                return
+        else:
+            digest = content_hash(frame)
+            row = db.execute("SELECT id FROM frames WHERE hash = ?", (digest,)).fetchone()
+            if row is not None:
+                frame_id = row[0]
+                self.duplicates += 1
+            else:
+                ok, png = cv2.imencode(".png", np.ascontiguousarray(frame[..., :3]),
+                                       [cv2.IMWRITE_PNG_COMPRESSION, PNG_COMPRESSION])
+                if not ok:
+                    raise RuntimeError("could not encode frame")
+                offset = blobs.seek(0, os.SEEK_END)
+                blobs.write(png.tobytes())
+                blobs.flush()
+                height, width = frame.shape[:2]
+                frame_id = db.execute("INSERT INTO frames (hash, offset, length, width, height) "
+                                      "VALUES (?, ?, ?, ?, ?)",
+                                      (digest, offset, len(png), width, height)).lastrowid
+                self.frames += 1
+                self.bytes += len(png)
+            self._last_frame[source] = frame_id
+
+        # source texts and translations, searched by SessionStore.search
+        texts = "\n".join(text if translated is None else f"{text}\n{translated}"
+                          for _, text, _, translated in entries)
+        db.execute("INSERT INTO records (time, source, frame_id, entries, texts) VALUES (?, ?, ?, ?, ?)",
+                   (timestamp, source, frame_id, json.dumps(entries, ensure_ascii=False), texts))
+        db.commit()
+        self.records += 1
+
+    def stats(self):
+        return {"records": self.records,
+                "frames": self.frames,
+                "duplicates": self.duplicates,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "bytes": self.bytes}
+
+    def close(self):
+        """
+        Write everything queued, then stop
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+
+class SessionStore:
+    """
+    Read access to a recorded session: records by index (in recording order), frames
+    decoded from the memory-mapped frames.bin, text search over source text and
+    translations, and re-rendering of any record without OCR or translation.
+    Works on a session that is still being recorded.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        path = os.path.join(directory, INDEX_FILE)
+        if not os.path.exists(path):
+            raise RuntimeError(f"Not a recorded session: {directory}")
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._blobs = open(os.path.join(directory, FRAMES_FILE), "rb")
+        self._map = None
+        self._decoded = LRUCache(DECODED_FRAMES)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def record(self, index):
+        """
+        (time, source, frame_id, entries) of the index-th record
+        """
+        # records are only ever appended, so ids run 1, 2, ... in recording order
+        with self._lock:
+            row = self._db.execute("SELECT time, source, frame_id, entries FROM records WHERE id = ?",
+                                   (index + 1,)).fetchone()
+        if index < 0 or row is None:
+            raise IndexError(index)
+        timestamp, source, frame_id, entries = row
+        return timestamp, source, frame_id, [tuple(entry) for entry in json.loads(entries)]
+
+    def _blob(self, offset, length):
+        # remap when the recording grew past the current mapping
+        if self._map is None or offset + length > len(self._map):
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._blobs.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(self._map, dtype=np.uint8, count=length, offset=offset)
+
+    def frame(self, frame_id):
+        """
+        Frame frame_id as a BGRA array
+        """
+        with self._lock:
+            frame = self._decoded.get(frame_id)
+            if frame is not None:
+                return frame
+            row = self._db.execute("SELECT offset, length FROM frames WHERE id = ?", (frame_id,)).fetchone()
+            if row is None:
+                raise KeyError(frame_id)
+            bgr = cv2.imdecode(self._blob(*row), cv2.IMREAD_COLOR)
+            frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2BGRA)
+            self._decoded.put(frame_id, frame)
+            return frame
+
+    def search(self, text, limit=None):
+        """
+        Indexes of the records whose source text or translation contains text
+        """
+        with self._lock:
+            hits = self._db.execute("SELECT id FROM records WHERE instr(texts, ?) > 0 ORDER BY id LIMIT ?",
+                                    (text, -1 if limit is None else limit)).fetchall()
+        return [record_id - 1 for record_id, in hits]
+
+    def render(self, index):
+        """
+        (frame, overlay items) of the index-th record, as they were shown
+        """
+        _, _, frame_id, entries = self.record(index)
+        return self.frame(frame_id), overlay_items(entries)
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._blobs.close()
+            self._db.close()
+
+
+class SessionFrameSource(FrameSource):
+    """
+    Replays the frames of a recorded session in recording order, once per change of
+    frame, as a deterministic input for the pipeline and benchmarks
+    """
+    def __init__(self, directory, loop=False):
+        self.store = SessionStore(directory)
+        self.loop = loop
+        with self.store._lock:
+            rows = self.store._db.execute("SELECT frame_id FROM records ORDER BY id").fetchall()
+        self.frame_ids = [frame_id for i, (frame_id,) in enumerate(rows) if i == 0 or rows[i - 1][0] != frame_id]
+        self._index = 0
+
+    def grab(self):
+        if self._index >= len(self.frame_ids):
+            if not self.loop or not self.frame_ids:
+                return None
+            self._index = 0
+        frame_id = self.frame_ids[self._index]
+        self._index += 1
+        return self.store.frame(frame_id)
+
+    def close(self):
+        self.store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search or export a recorded session")
+    parser.add_argument("session", help="session directory")
+    parser.add_argument("--search", help="list the records whose text or translation contains this")
+    parser.add_argument("--export", help="write every record as JSONL to this path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    store = SessionStore(args.session)
+    try:
+        if args.search:
+            for index in store.search(args.search):
+                timestamp, source, frame_id, entries = store.record(index)
+                texts = " | ".join(text if translated is None else f"{text} -> {translated}"
+                                   for _, text, _, translated in entries)
+                print(f"{index}\t{time.strftime('%H:%M:%S', time.localtime(timestamp))}\t{texts}")
+        if args.export:
+            out = sys.stdout if args.export == "-" else open(args.export, "w", encoding="utf-8")
+            try:
+                for index in range(len(store)):
+                    timestamp, source, frame_id, entries = store.record(index)
+                    out.write(json.dumps({"time": timestamp, "source": source, "frame": frame_id,
+                                          "results": [{"box": box, "text": text, "conf": conf, "translation": translated}
+                                                      for box, text, conf, translated in entries]},
+                                         ensure_ascii=False) + "\n")
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import os
+from PySide6.QtCore import QSettings, QStandardPaths
+ORGANIZATION_NAME = "OCRApp"
+APPLICATION_NAME = "Gamegrab"
+
+DEFAULTS = {
+    # run full detection + recognition on both the colour and grey frame
+    "ocr/dual_pass": False,
+    # only re-OCR the tiles that changed since the previous frame
+    "ocr/incremental": True,
+    # detect on a downscaled frame and recognize full-resolution crops
+    "ocr/adaptive_resolution": False,
+    # long side of the detection frame until the text size of recent frames is known
+    "ocr/detect_long_side": 1280,
+    # convert frames and prepare the detector input on the GPU when running on CUDA
+    "ocr/gpu_preprocess": True,
+    # OCR the queued frames of several windows together, recognizing their text in one call
+    "ocr/batch_sources": False,
+    # run one throwaway inference after loading the model
+    "ocr/warmup": True,
+    # OCR inference backend: torch (EasyOCR) or onnx (ONNX Runtime, needs onnxruntime); applies on next start
+    "ocr/backend": "torch",
+    # int8 weights for CPU inference (dynamic quantization); off runs the fp32 models
+    "ocr/quantize": True,
+    # CPU threads for OCR inference (0: the library default)
+    "ocr/cpu_threads": 0,
+    # comma separated EasyOCR languages; a Latin-only set such as "en" loads a smaller, faster model
+    "ocr/languages": "ja,en",
+    # group boxes into lines and paragraphs (reading order, vertical text) and translate per paragraph
+    "ocr/group_paragraphs": True,
+    # follow text lines across live frames: vote on readings, translate a line once it is stable
+    "ocr/tracking": True,
+    # live frames a line's reading has to hold before it is translated
+    "ocr/stable_frames": 3,
+    # release pooled frame buffers and cached GPU memory after this many seconds without OCR (0: never)
+    "memory/idle_trim_seconds": 30,
+    # record every shown frame with its OCR results and translations for search and replay
+    "session/record": False,
+    # directory of the recording; empty: a new timestamped directory under the app data
+    "session/directory": "",
+    # frames per second grabbed in live capture mode
+    "capture/fps": 5,
+    # translation backend: DeepL, Azure, Google, Offline, Auto (fastest available)
+    # or Stub (offline fake with a fixed latency)
+    "translation/provider": "DeepL",
+    "translation/azure_region": "",
+    "translation/stub_latency_ms": 500,
+    "translation/target_lang": "EN-US",
+    # JSON {window profile key: [[x0, y0, x1, y1], ...]} of OCR regions as frame fractions
+    "roi/profiles": "{}",
+    # on-screen per-stage timing readout
+    "debug/show_timings": False,
+    # log per-frame OCR statistics and timings (debug level)
+    "debug/log_stats": False,
+}
+
+# ini file used instead of the user's settings, see use_settings_file
+_settings_file = None
+
+def use_settings_file(path):
+    """
+    Read and write settings in the ini file at path instead of the user's profile
+    (benchmarks, tests); None goes back to the user's settings
+    """
+    global _settings_file
+    _settings_file = path
+
+def _settings():
+    if _settings_file is not None:
+        return QSettings(_settings_file, QSettings.Format.IniFormat)
+    return QSettings(ORGANIZATION_NAME, APPLICATION_NAME)
+
+def get_setting(name: str):
+    if name not in DEFAULTS:
+        raise ValueError(f"Unknown setting: {name}")
+    default = DEFAULTS[name]
+    return _settings().value(name, default, type=type(default))
+
+def set_setting(name: str, value):
+    if name not in DEFAULTS:
+        raise ValueError(f"Unknown setting: {name}")
+    _settings().setValue(name, value)
+
+def data_dir():
+    """
+    Per-user directory for caches and other app data, created on first use
+    """
+    base = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    path = os.path.join(base, ORGANIZATION_NAME, APPLICATION_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
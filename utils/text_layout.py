@@ -0,0 +1,63 @@
+from collections import OrderedDict
+from PySide6.QtGui import QFont, QFontMetrics
+
+# point size translations start from before shrinking to fit their box
+MAX_FONT_SIZE = 14
+# fitted sizes remembered per (text, box width, box height)
+FIT_CACHE_SIZE = 4096
+
+
+class FontFitter:
+    """
+    Finds the largest point size (up to max_size) at which a text fits a box.
+
+    Sizes are binary-searched instead of stepped down one at a time, QFont / QFontMetrics
+    are built once per size and fitted sizes are memoized, so repeated lines and boxes
+    across frames cost a dictionary lookup.
+    """
+    def __init__(self, family: str, max_size=MAX_FONT_SIZE, cache_size=FIT_CACHE_SIZE):
+        self.family = family
+        self.max_size = max_size
+        self.cache_size = cache_size
+        self._fonts = {}
+        self._metrics = {}
+        self._fitted = OrderedDict()
+
+    def font(self, size):
+        font = self._fonts.get(size)
+        if font is None:
+            font = QFont(self.family, size)
+            self._fonts[size] = font
+            self._metrics[size] = QFontMetrics(font)
+        return font
+
+    def fits(self, text, size, w, h):
+        self.font(size)
+        metrics = self._metrics[size]
+        return metrics.horizontalAdvance(text) <= w and metrics.height() <= h
+
+    def fit(self, text, w, h):
+        """
+        Largest size whose rendering of text fits in w x h; 1 when nothing fits
+        """
+        key = (text, w, h)
+        size = self._fitted.get(key)
+        if size is not None:
+            self._fitted.move_to_end(key)
+            return size
+
+        low, high = 1, self.max_size
+        while low < high:
+            mid = (low + high + 1) // 2
+            if self.fits(text, mid, w, h):
+                low = mid
+            else:
+                high = mid - 1
+
+        self._fitted[key] = low
+        if len(self._fitted) > self.cache_size:
+            self._fitted.popitem(last=False)
+        return low
+
+    def fitted_font(self, text, w, h):
+        return self.font(self.fit(text, w, h))
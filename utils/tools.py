@@ -2,9 +2,10 @@ import ctypes as C
 from ctypes import c_int32, c_uint8, c_void_p, POINTER
 from ctypes.wintypes import HWND as C_HWND
 import numpy as np
-import pygetwindow as gw
-from PySide6.QtGui import QImage
+from .capture_session import BaseCaptureSession
+from .buffers import frame_pool
 import os
+import weakref
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DLL_PATH = os.path.join(BASE_DIR, "cpp_backend", "wgc_core.dll")
@@ -24,65 +25,84 @@ dll.wgc_capture_bgra.restype  = c_int32
 dll.wgc_free.argtypes = [c_void_p]
 dll.wgc_free.restype  = None
 
+# the caller's buffer is too small; the frame's size comes back in the BGRAFrame
+WGC_ERR_BUFFER = -6
+
+# DLLs built before capture sessions only have the one-shot capture
+HAS_SESSIONS = hasattr(dll, "wgc_session_open")
+if HAS_SESSIONS:
+    dll.wgc_session_open.argtypes = [C_HWND, POINTER(c_void_p)]
+    dll.wgc_session_open.restype  = c_int32
+    dll.wgc_session_grab.argtypes = [c_void_p, POINTER(c_uint8), c_int32, POINTER(BGRAFrame), c_int32]
+    dll.wgc_session_grab.restype  = c_int32
+    dll.wgc_session_close.argtypes = [c_void_p]
+    dll.wgc_session_close.restype  = None
+
 def capture_hwnd_to_image(hwnd: int, timeout_ms=2000):
+    """
+    Capture one frame of hwnd as a BGRA NumPy array of shape (height, width, 4).
+
+    The array is a stride-aware view straight over the DLL's buffer, so no pixels are
+    copied; the buffer is released with wgc_free once the last view is garbage collected.
+    """
     frame = BGRAFrame()
     rc = dll.wgc_capture_bgra(C_HWND(hwnd), C.byref(frame), timeout_ms)
     if rc != 0:
         raise RuntimeError(f"capture failed rc={rc}")
 
+    address = C.cast(frame.data, c_void_p).value
     try:
         # Build a NumPy view over the unmanaged memory (stride-aware)
         # Use stride*height to include any padding, then slice to width*4.
         byte_count = frame.stride * frame.height
-        buf = C.cast(frame.data, C.POINTER(c_uint8 * byte_count)).contents
+        buf = (c_uint8 * byte_count).from_address(address)
         np_rowbuf = np.frombuffer(buf, dtype=np.uint8).reshape(frame.height, frame.stride)
-
-
-
-        # Keep only the visible part (w*4). Make a deep copy so we can free the DLL buffer.
-        np_bgra = np_rowbuf[:, :frame.width * 4].copy()
-      
-        # keep alpha
-
-        qimg = QImage(
-            np_bgra.data, frame.width, frame.height, frame.width * 4,
-            QImage.Format.Format_ARGB32
-        ).copy()  # deep copy
-
-
-
-        # no alpha, RGB888
-        #np_bgr = np_bgra.reshape(frame.height, frame.width, 4)[:, :, :3]       # BGRA -> BGR
-        #qimg = QImage(np_bgr.data, frame.width, frame.height, frame.width * 3,
-        #              QImage.Format.Format_BGR888).copy()
-
-        return qimg
-    finally:
-        dll.wgc_free(frame.data)
-
-# DEBUG
-def screen_list():
-    return gw.getAllTitles()
-
-def capture_screen(screen):
-    target_window = gw.getWindowsWithTitle(screen)[0]
-
-    if not target_window:
-        raise RuntimeError(f"No window matching: {target_window}")
-    
-    hwnd = target_window._hWnd
-
-    return capture_hwnd_to_image(hwnd)
-
-def main():
-    # DEBUG
-    print(gw.getAllTitles())
-    qimg = capture_screen("TEVI")
-    if not qimg.save("output.png"):
-        print("Failed to save image")
-    else:
-        print("Saved capture to output.png")
-
-
-if __name__ == "__main__":
-    main()
+    except Exception:
+        dll.wgc_free(address)
+        raise
+
+    # free the DLL buffer together with the ctypes array backing every view of it
+    weakref.finalize(buf, dll.wgc_free, address)
+
+    # keep only the visible part (w*4) of every row, still a view
+    return np_rowbuf[:, :frame.width * 4].reshape(frame.height, frame.width, 4)
+
+class CaptureSession(BaseCaptureSession):
+    """
+    WGC capture of hwnd kept open across grabs: the D3D device, frame pool and session are
+    created once by open(), and each grab copies the newest frame straight into a pooled
+    array instead of a fresh DLL allocation
+    """
+    def __init__(self, hwnd, timeout_ms=2000, pool=frame_pool):
+        super().__init__(hwnd, timeout_ms, pool)
+        self._handle = None
+
+    @property
+    def is_open(self):
+        return self._handle is not None
+
+    def open(self):
+        if self.is_open:
+            return
+        handle = c_void_p()
+        rc = dll.wgc_session_open(C_HWND(self.hwnd), C.byref(handle))
+        if rc != 0:
+            raise RuntimeError(f"capture session failed rc={rc}")
+        self._handle = handle
+
+    def _grab_into(self, buffer):
+        frame = BGRAFrame()
+        data = None if buffer is None else buffer.ctypes.data_as(POINTER(c_uint8))
+        capacity = 0 if buffer is None else buffer.nbytes
+        rc = dll.wgc_session_grab(self._handle, data, capacity, C.byref(frame), self.timeout_ms)
+        if rc == WGC_ERR_BUFFER:
+            return frame.width, frame.height
+        if rc != 0:
+            raise RuntimeError(f"capture failed rc={rc}")
+        if (frame.height, frame.width, 4) != buffer.shape:
+            # a smaller frame fit into the buffer; have it sized exactly next time
+            return frame.width, frame.height
+
+    def _close(self):
+        dll.wgc_session_close(self._handle)
+        self._handle = None
@@ -0,0 +1,161 @@
+import difflib
+from collections import deque
+import numpy as np
+from .boxes import quads_to_rects, pairwise_iou
+
+# boxes of consecutive frames overlapping at least this much belong to the same track
+TRACK_IOU = 0.3
+# a tracked box only moves when the new box overlaps it less than this (suppresses jitter)
+BOX_HOLD_IOU = 0.8
+# readings at least this similar (difflib ratio) are the same line with OCR noise
+SAME_LINE_RATIO = 0.6
+# readings per track that take part in the vote
+VOTE_WINDOW = 5
+# frames the voted text has to win in a row before the line counts as stable
+STABLE_FRAMES = 3
+# frames a track survives without a matching box (detection misses, brief occlusion)
+MAX_MISSED = 2
+
+
+class TextTrack:
+    """
+    One line of text followed across frames.
+
+    Readings are voted on by summed confidence over the last VOTE_WINDOW frames. Once the
+    winner held for stable_frames it becomes stable_text; its translation is kept for as
+    long as the track lives, whatever noisy readings come in later.
+    """
+    def __init__(self, box, text, conf):
+        self.box = box
+        self.readings = deque(maxlen=VOTE_WINDOW)
+        self.winner = None
+        self.streak = 0
+        self.stable_text = None
+        self.translation = None
+        self.missed = 0
+        self.observe(text, conf)
+
+    def similar(self, text):
+        """
+        Whether text reads as the line this track follows (rather than a new line in the same place)
+        """
+        reference = self.stable_text or self.winner
+        return difflib.SequenceMatcher(None, reference, text).ratio() >= SAME_LINE_RATIO
+
+    def observe(self, text, conf):
+        self.readings.append((text, conf))
+        votes = {}
+        for reading, weight in self.readings:
+            votes[reading] = votes.get(reading, 0.0) + weight
+        winner = max(votes, key=votes.get)
+        self.streak = self.streak + 1 if winner == self.winner else 1
+        self.winner = winner
+        self.missed = 0
+
+    def stabilize(self, stable_frames):
+        """
+        Promote the winner to stable_text once it held long enough; a different stable
+        text (a corrected reading) drops the translation of the old one
+        """
+        if self.streak >= stable_frames and self.winner != self.stable_text:
+            self.stable_text = self.winner
+            self.translation = None
+
+    @property
+    def text(self):
+        return self.stable_text if self.stable_text is not None else self.winner
+
+
+class TextTracker:
+    """
+    Links the OCR entries of consecutive frames of one source into tracks by box IoU, so
+    jittering boxes and one-frame misreadings don't change what is painted or translated.
+
+    update() takes (box, text, conf, translated) entries and returns them with the track's
+    box and voted text, plus a stable flag per entry: only stable lines should be sent for
+    translation, and each track's translation is reused until the track ends.
+    """
+    def __init__(self, stable_frames=STABLE_FRAMES):
+        self.stable_frames = stable_frames
+        self.tracks = []
+        self.stats = {"tracks": 0, "stable": 0, "started": 0, "translations_reused": 0}
+
+    def reset(self):
+        self.tracks = []
+
+    def update(self, entries, require_stable=True):
+        """
+        Match entries to the live tracks. With require_stable False (single screenshots)
+        every line is stable right away.
+
+        Returns (entries, stable) in the order of entries
+        """
+        stable_frames = self.stable_frames if require_stable else 1
+        matches = self._match(entries)
+
+        tracks, out, stable = [], [], []
+        reused = 0
+        for i, (box, text, conf, translated) in enumerate(entries):
+            track = matches.get(i)
+            if track is not None and track.similar(text):
+                if pairwise_iou(quads_to_rects([box]), quads_to_rects([track.box]))[0, 0] < BOX_HOLD_IOU:
+                    track.box = box
+                track.observe(text, conf)
+            else:
+                # a different line where the old one was (next dialogue line) starts a new track
+                track = TextTrack(box, text, conf)
+                self.stats["started"] += 1
+            track.stabilize(stable_frames)
+            if translated is not None and text == track.stable_text and track.translation is None:
+                track.translation = translated
+            elif track.translation is not None:
+                reused += translated is None
+            tracks.append(track)
+            if track.translation is not None:
+                translated = track.translation
+            elif text != track.text:
+                # the translation that came in belongs to a reading that lost the vote
+                translated = None
+            out.append((track.box, track.text, conf, translated))
+            stable.append(track.stable_text is not None)
+
+        # keep unmatched tracks around for a few frames so a missed detection doesn't restart them
+        matched = set(map(id, tracks))
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.missed += 1
+                if track.missed <= MAX_MISSED:
+                    tracks.append(track)
+        self.tracks = tracks
+        self.stats.update({"tracks": len(tracks),
+                           "stable": sum(stable),
+                           "translations_reused": self.stats["translations_reused"] + reused})
+        return out, stable
+
+    def _match(self, entries):
+        """
+        Greedy one-to-one assignment of entries to tracks, highest IoU first
+        """
+        if not entries or not self.tracks:
+            return {}
+        iou = pairwise_iou(quads_to_rects([entry[0] for entry in entries]),
+                           quads_to_rects([track.box for track in self.tracks]))
+        matches = {}
+        taken = set()
+        for flat in np.argsort(iou, axis=None)[::-1]:
+            i, j = divmod(int(flat), len(self.tracks))
+            if iou[i, j] < TRACK_IOU:
+                break
+            if i in matches or j in taken:
+                continue
+            matches[i] = self.tracks[j]
+            taken.add(j)
+        return matches
+
+    def set_translations(self, translations):
+        """
+        Attach background translations ({text: translation}) to the tracks whose stable text they translate
+        """
+        for track in self.tracks:
+            if track.translation is None and track.stable_text in translations:
+                track.translation = translations[track.stable_text]
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from .settings import data_dir
+
+# translations held in memory in front of the database
+MEMORY_ENTRIES = 4096
+# rows kept on disk; the least recently used are evicted past this
+MAX_DISK_ENTRIES = 200_000
+# rows not used for this long are evicted
+MAX_AGE_SECONDS = 90 * 24 * 60 * 60
+# run disk eviction after this many writes
+EVICT_EVERY = 500
+
+
+class TranslationCache:
+    """
+    Two-tier translation cache: a bounded in-memory LRU in front of a SQLite table.
+
+    Entries are keyed by (provider, source language, target language, text) so the same
+    line translated into another language or by another provider is stored separately.
+    Safe to use from the OCR worker thread.
+    """
+    def __init__(self, path=None, memory_entries=MEMORY_ENTRIES,
+                 max_disk_entries=MAX_DISK_ENTRIES, max_age_seconds=MAX_AGE_SECONDS):
+        self.path = path or os.path.join(data_dir(), "translations.sqlite3")
+        self.memory_entries = memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age_seconds = max_age_seconds
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                provider TEXT NOT NULL,
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                text TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (provider, source_lang, target_lang, text)
+            )""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+        self.evict()
+
+    def _remember(self, key, translated):
+        self._memory[key] = translated
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, provider, source_lang, target_lang, texts):
+        """
+        Look up texts, returning {text: translation} for every cached one
+        """
+        source_lang = source_lang or "auto"
+        found = {}
+        missing = []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                key = (provider, source_lang, target_lang, text)
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[text] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.append(text)
+
+            now = time.time()
+            for text in missing:
+                row = self._db.execute(
+                    "SELECT translated FROM translations "
+                    "WHERE provider = ? AND source_lang = ? AND target_lang = ? AND text = ?",
+                    (provider, source_lang, target_lang, text)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    continue
+                found[text] = row[0]
+                self.disk_hits += 1
+                self._remember((provider, source_lang, target_lang, text), row[0])
+                self._db.execute(
+                    "UPDATE translations SET last_used = ? "
+                    "WHERE provider = ? AND source_lang = ? AND target_lang = ? AND text = ?",
+                    (now, provider, source_lang, target_lang, text))
+            self._db.commit()
+        return found
+
+    def get(self, provider, source_lang, target_lang, text):
+        return self.get_many(provider, source_lang, target_lang, [text]).get(text)
+
+    def put_many(self, provider, source_lang, target_lang, pairs):
+        """
+        Store (text, translation) pairs
+        """
+        source_lang = source_lang or "auto"
+        now = time.time()
+        rows = [(provider, source_lang, target_lang, text, translated, now) for text, translated in pairs]
+        with self._lock:
+            for provider_, source_, target_, text, translated, _ in rows:
+                self._remember((provider_, source_, target_, text), translated)
+            self._db.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+            self._writes += len(rows)
+            evict = self._writes >= EVICT_EVERY
+        if evict:
+            self.evict()
+
+    def put(self, provider, source_lang, target_lang, text, translated):
+        self.put_many(provider, source_lang, target_lang, [(text, translated)])
+
+    def evict(self):
+        """
+        Drop rows older than max_age_seconds, then the least recently used past max_disk_entries
+        """
+        with self._lock:
+            self._writes = 0
+            self._db.execute("DELETE FROM translations WHERE last_used < ?",
+                             (time.time() - self.max_age_seconds,))
+            self._db.execute("""
+                DELETE FROM translations WHERE rowid IN (
+                    SELECT rowid FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?
+                )""", (self.max_disk_entries,))
+            self._db.commit()
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {"memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory)}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,127 @@
+import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+# seconds to wait for a batch before giving up on the translations still missing
+TRANSLATION_TIMEOUT = 10.0
+# concurrent translate_many calls
+MAX_WORKERS = 2
+
+log = logging.getLogger(__name__)
+
+
+class _Gather:
+    """
+    Collects the results of several translation jobs and calls back once,
+    when all of them finished or the timeout expired (whichever comes first)
+    """
+    def __init__(self, futures, callback, timeout):
+        self.pending = set(futures)
+        self.callback = callback
+        self.results = {}
+        self.done = False
+        self.lock = threading.Lock()
+        self.timer = threading.Timer(timeout, self.finish)
+        self.timer.daemon = True
+        self.timer.start()
+        for future in futures:
+            future.add_done_callback(self.on_done)
+
+    def on_done(self, future):
+        with self.lock:
+            if self.done:
+                return
+            if future.exception() is None:
+                self.results.update(future.result())
+            else:
+                log.warning("translation failed: %s", future.exception())
+            self.pending.discard(future)
+            finished = not self.pending
+        if finished:
+            self.finish()
+
+    def finish(self):
+        with self.lock:
+            if self.done:
+                return
+            self.done = True
+            results = dict(self.results)
+        self.timer.cancel()
+        self.callback(results)
+
+
+class TranslationPipeline:
+    """
+    Runs translator.translate_many off the OCR thread.
+
+    Texts already being translated are not sent again: a request for them waits on the
+    in-flight job instead (coalescing across frames). Callbacks run on a pool thread.
+    """
+    def __init__(self, translator, max_workers=MAX_WORKERS, timeout=TRANSLATION_TIMEOUT):
+        self.translator = translator
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="translate")
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+    def cached(self, texts, target_lang):
+        """
+        Translations available without a network round-trip, as {text: translation}
+        """
+        return self.translator.cached_many(texts, target_lang=target_lang)
+
+    def submit(self, texts, target_lang, callback):
+        """
+        Translate texts in the background; callback receives {text: translation} for every
+        text that was translated before the timeout
+        """
+        futures = set()
+        new_texts = []
+        with self._lock:
+            for text in dict.fromkeys(texts):
+                future = self._inflight.get((text, target_lang))
+                if future is not None:
+                    futures.add(future)
+                else:
+                    new_texts.append(text)
+
+            if new_texts:
+                future = self.executor.submit(self._translate, new_texts, target_lang)
+                for text in new_texts:
+                    self._inflight[(text, target_lang)] = future
+                futures.add(future)
+
+        if not futures:
+            callback({})
+            return
+        with self._lock:
+            self._waiting += 1
+        _Gather(futures, partial(self._done, callback), self.timeout)
+
+    def _done(self, callback, results):
+        try:
+            callback(results)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def pending(self):
+        """
+        Number of submitted requests whose callback hasn't run yet
+        """
+        with self._lock:
+            return self._waiting
+
+    def _translate(self, texts, target_lang):
+        try:
+            translated = self.translator.translate_many(texts, target_lang=target_lang)
+            return dict(zip(texts, translated))
+        finally:
+            with self._lock:
+                for text in texts:
+                    self._inflight.pop((text, target_lang), None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -1,29 +1,323 @@
 from .key_ring import get_api_key
+from .translation_cache import TranslationCache
+from .settings import get_setting
+from . import http
 import deepl
+import logging
+import random
+import time
 
-class DeepLTranslator:
-    def __init__(self):
-        api_key = get_api_key("DeepL")
-        self._cache = {}
-        if not api_key:
+# attempts per batch when the provider answers 429
+MAX_RETRIES = 4
+# first backoff delay in seconds, doubled on every retry
+BACKOFF_BASE = 0.5
+
+log = logging.getLogger(__name__)
+
+
+class RateLimitError(Exception):
+    """
+    Provider asked us to slow down (HTTP 429)
+    """
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaExceededError(Exception):
+    """
+    Provider quota for the current billing period is used up
+    """
+
+
+def batches(texts, max_segments, max_chars):
+    """
+    Split texts into consecutive batches within a provider's segment and character limits
+    """
+    batch, chars = [], 0
+    for text in texts:
+        if batch and (len(batch) >= max_segments or chars + len(text) > max_chars):
+            yield batch
+            batch, chars = [], 0
+        batch.append(text)
+        chars += len(text)
+    if batch:
+        yield batch
+
+
+def short_lang(code):
+    """
+    DeepL style codes (EN-US, ZH-HANS) to the BCP-47 codes Azure and Google use (en, zh-Hans)
+    """
+    if code is None:
+        return None
+    lang, _, variant = code.partition("-")
+    if lang.upper() == "ZH":
+        return "zh-Hant" if variant.upper() == "HANT" else "zh-Hans"
+    if lang.upper() == "PT" and variant:
+        return "pt-PT" if variant.upper() == "PT" else "pt"
+    return lang.lower()
+
+
+class Translator:
+    """
+    Shared translator layer: caching, batching to provider limits and retry with backoff.
+
+    Backends set provider / max_segments / max_chars and implement translate_batch,
+    raising RateLimitError on 429 and QuotaExceededError once the quota is gone.
+    """
+    provider = None
+    max_segments = 50
+    max_chars = 30000
+
+    def __init__(self, cache: TranslationCache | None = None):
+        self.cache = cache if cache is not None else TranslationCache()
+        self.api_key = get_api_key(self.provider)
+        self.quota_exceeded = False
+        self.requests = 0
+        self.chars_sent = 0
+        # smoothed seconds per character of the last requests, used for routing
+        self.seconds_per_char = None
+
+    def available(self):
+        return bool(self.api_key) and not self.quota_exceeded
+
+    def translate_batch(self, texts, target_lang, source_lang):
+        raise NotImplementedError
+
+    def translate(self, text: str, target_lang: str = "EN-US", source_lang: str | None = None):
+        return self.translate_many([text], target_lang=target_lang, source_lang=source_lang)[0]
+
+    def cached_many(self, texts, target_lang: str = "EN-US", source_lang: str | None = None):
+        return self.cache.get_many(self.provider, source_lang, target_lang, [t for t in texts if t])
+
+    def translate_many(self, texts, target_lang: str = "EN-US", source_lang: str | None = None):
+        cached = self.cached_many(texts, target_lang=target_lang, source_lang=source_lang)
+        to_send = list(dict.fromkeys(t for t in texts if t and t not in cached))
+        if to_send and self.available():
+            for batch in batches(to_send, self.max_segments, self.max_chars):
+                returned = self._send(batch, target_lang, source_lang)
+                self.cache.put_many(self.provider, source_lang, target_lang, zip(batch, returned))
+                cached.update(zip(batch, returned))
+        return [cached.get(t, t) for t in texts]
+
+    def _send(self, batch, target_lang, source_lang):
+        for attempt in range(MAX_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                returned = self.translate_batch(batch, target_lang, source_lang)
+            except RateLimitError as e:
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = e.retry_after or BACKOFF_BASE * 2 ** attempt
+                time.sleep(delay * random.uniform(1.0, 1.25))
+                continue
+            except QuotaExceededError:
+                self.quota_exceeded = True
+                raise
+
+            chars = sum(len(t) for t in batch)
+            self.requests += 1
+            self.chars_sent += chars
+            per_char = (time.perf_counter() - start) / max(chars, 1)
+            self.seconds_per_char = per_char if self.seconds_per_char is None else 0.8 * self.seconds_per_char + 0.2 * per_char
+            return returned
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _check_response(response, provider):
+    if response.status_code == 429:
+        raise RateLimitError(f"{provider} rate limited", _retry_after(response))
+    if response.status_code == 403:
+        raise QuotaExceededError(f"{provider} quota exceeded: {response.text}")
+    response.raise_for_status()
+
+
+class DeepLTranslator(Translator):
+    provider = "DeepL"
+    max_segments = 50
+    max_chars = 30000
+
+    def __init__(self, cache: TranslationCache | None = None):
+        super().__init__(cache)
+        if not self.api_key:
             self.deepl_client = None
         else:
-            self.deepl_client = deepl.DeepLClient(api_key)
-        
-    def translate(self, text: str, target_lang: str = "EN-US"):
-        if not self.deepl_client:
-            return text
-        if text in self._cache:
-            return self._cache[text]
-        res = self.deepl_client.translate_text(text, target_lang=target_lang)
-        self._cache[text] = res.text
-        return res.text
-    
-    def translate_many(self, texts, target_lang: str = "EN-US"):
-        to_send = [t for t in texts if t and t not in self._cache]
-        if to_send:
-            res = self.deepl_client.translate_text(to_send, target_lang=target_lang)
-            for input, returned in zip(to_send, res):
-                self._cache[input] = returned.text 
-        return [self._cache.get(t, t) for t in texts]
-            
+            self.deepl_client = deepl.DeepLClient(self.api_key)
+
+    def available(self):
+        return self.deepl_client is not None and not self.quota_exceeded
+
+    def translate_batch(self, texts, target_lang, source_lang):
+        try:
+            res = self.deepl_client.translate_text(texts, target_lang=target_lang, source_lang=source_lang)
+        except deepl.TooManyRequestsException as e:
+            raise RateLimitError(str(e)) from e
+        except deepl.QuotaExceededException as e:
+            raise QuotaExceededError(str(e)) from e
+        return [r.text for r in res]
+
+
+class AzureTranslator(Translator):
+    """
+    Azure AI Translator (Text Translation v3)
+    """
+    provider = "Azure"
+    max_segments = 1000
+    max_chars = 50000
+    endpoint = "https://api.cognitive.microsofttranslator.com/translate"
+
+    def translate_batch(self, texts, target_lang, source_lang):
+        params = {"api-version": "3.0", "to": short_lang(target_lang)}
+        if source_lang:
+            params["from"] = short_lang(source_lang)
+        headers = {"Ocp-Apim-Subscription-Key": self.api_key}
+        region = get_setting("translation/azure_region")
+        if region:
+            headers["Ocp-Apim-Subscription-Region"] = region
+
+        response = http.session().post(self.endpoint, params=params, headers=headers,
+                                       json=[{"Text": t} for t in texts], timeout=http.REQUEST_TIMEOUT)
+        _check_response(response, self.provider)
+        return [item["translations"][0]["text"] for item in response.json()]
+
+
+class GoogleTranslator(Translator):
+    """
+    Google Cloud Translation (Basic, v2) with an API key
+    """
+    provider = "Google"
+    max_segments = 128
+    max_chars = 5000
+    endpoint = "https://translation.googleapis.com/language/translate/v2"
+
+    def translate_batch(self, texts, target_lang, source_lang):
+        body = {"q": texts, "target": short_lang(target_lang), "format": "text"}
+        if source_lang:
+            body["source"] = short_lang(source_lang)
+
+        response = http.session().post(self.endpoint, params={"key": self.api_key},
+                                       json=body, timeout=http.REQUEST_TIMEOUT)
+        _check_response(response, self.provider)
+        return [item["translatedText"] for item in response.json()["data"]["translations"]]
+
+
+class OfflineTranslator(Translator):
+    """
+    Local translation through Argos Translate, no network needed.
+    Requires the optional argostranslate package and its language models.
+    """
+    provider = "Offline"
+    max_segments = 64
+    max_chars = 20000
+    default_source = "ja"
+
+    def __init__(self, cache: TranslationCache | None = None):
+        super().__init__(cache)
+        try:
+            import argostranslate.translate
+            self._argos = argostranslate.translate
+        except ImportError:
+            self._argos = None
+
+    def available(self):
+        return self._argos is not None and not self.quota_exceeded
+
+    def translate_batch(self, texts, target_lang, source_lang):
+        source = short_lang(source_lang) or self.default_source
+        target = short_lang(target_lang)
+        return [self._argos.translate(t, source, target) for t in texts]
+
+
+class StubTranslator(Translator):
+    """
+    Offline stand-in that sleeps for latency seconds per batch and tags the text,
+    for exercising the translation pipeline without network access
+    """
+    provider = "Stub"
+
+    def __init__(self, latency: float = 0.5, cache: TranslationCache | None = None):
+        super().__init__(cache if cache is not None else TranslationCache(":memory:"))
+        self.latency = latency
+
+    def available(self):
+        return not self.quota_exceeded
+
+    def translate_batch(self, texts, target_lang, source_lang):
+        time.sleep(self.latency)
+        return [f"[{target_lang}] {t}" for t in texts]
+
+
+class RoutingTranslator:
+    """
+    Sends each batch to the fastest backend that has a key and quota left,
+    falling back to the next one when a provider fails
+    """
+    provider = "Auto"
+
+    def __init__(self, translators):
+        self.translators = translators
+
+    def ranked(self):
+        usable = [t for t in self.translators if t.available()]
+        # unmeasured backends first so each gets probed once
+        return sorted(usable, key=lambda t: -1 if t.seconds_per_char is None else t.seconds_per_char)
+
+    def available(self):
+        return bool(self.ranked())
+
+    def translate(self, text: str, target_lang: str = "EN-US", source_lang: str | None = None):
+        return self.translate_many([text], target_lang=target_lang, source_lang=source_lang)[0]
+
+    def cached_many(self, texts, target_lang: str = "EN-US", source_lang: str | None = None):
+        found = {}
+        for translator in self.translators:
+            missing = [t for t in texts if t not in found]
+            if not missing:
+                break
+            found.update(translator.cached_many(missing, target_lang=target_lang, source_lang=source_lang))
+        return found
+
+    def translate_many(self, texts, target_lang: str = "EN-US", source_lang: str | None = None):
+        found = self.cached_many(texts, target_lang=target_lang, source_lang=source_lang)
+        for translator in self.ranked():
+            missing = list(dict.fromkeys(t for t in texts if t and t not in found))
+            if not missing:
+                break
+            try:
+                found.update(zip(missing, translator.translate_many(missing, target_lang=target_lang,
+                                                                   source_lang=source_lang)))
+            except (RateLimitError, QuotaExceededError, deepl.DeepLException, OSError) as e:
+                log.warning("%s translation failed, trying next provider: %s", translator.provider, e)
+        return [found.get(t, t) for t in texts]
+
+
+TRANSLATORS = {
+    "DeepL": DeepLTranslator,
+    "Azure": AzureTranslator,
+    "Google": GoogleTranslator,
+    "Offline": OfflineTranslator,
+}
+
+
+def create_translator(provider=None, cache=None):
+    """
+    Build the translator selected in settings; "Auto" routes between every configured backend.
+    cache is the TranslationCache to use, a new one on the app's cache file by default
+    (the stub always keeps its own in-memory cache)
+    """
+    provider = provider or get_setting("translation/provider")
+    if provider == "Stub":
+        return StubTranslator(latency=get_setting("translation/stub_latency_ms") / 1000)
+
+    if cache is None:
+        cache = TranslationCache()
+    if provider == "Auto":
+        return RoutingTranslator([cls(cache) for cls in TRANSLATORS.values()])
+    return TRANSLATORS.get(provider, DeepLTranslator)(cache)
@@ -0,0 +1,209 @@
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+
+# seconds between background refreshes of the window list
+REFRESH_INTERVAL = 2.0
+# title parts that change while a game runs: numbers (FPS, coordinates, versions) and separators
+VOLATILE_TITLE = re.compile(r"[\d.,:;/|()\[\]<>@#%+-]+")
+
+
+def normalize_title(title):
+    """
+    Title without its volatile parts, lower-cased, as a fallback profile key
+    """
+    return " ".join(VOLATILE_TITLE.sub(" ", title).lower().split())
+
+
+class WindowProvider(ABC):
+    """
+    Source of top-level windows; windows() returns {hwnd: title}
+    """
+    @abstractmethod
+    def windows(self):
+        raise NotImplementedError
+
+    def profile_key(self, hwnd, title):
+        """
+        Identifier of the application behind a window that stays the same across title
+        changes and restarts, for per-window settings
+        """
+        return normalize_title(title)
+
+
+class PyGetWindowProvider(WindowProvider):
+    """
+    Windows enumerated through pygetwindow (Windows only)
+    """
+    def __init__(self):
+        import pygetwindow
+        self._gw = pygetwindow
+
+    def windows(self):
+        return {window._hWnd: window.title for window in self._gw.getAllWindows()}
+
+    def profile_key(self, hwnd, title):
+        # executable and window class: stable while the title shows FPS counters, map names, ...
+        executable = _window_executable(hwnd)
+        if executable is None:
+            return super().profile_key(hwnd, title)
+        return f"{executable}|{_window_class(hwnd)}"
+
+
+def _window_class(hwnd):
+    import ctypes
+    from ctypes import wintypes
+    buffer = ctypes.create_unicode_buffer(256)
+    ctypes.windll.user32.GetClassNameW(wintypes.HWND(hwnd), buffer, len(buffer))
+    return buffer.value
+
+
+def _window_executable(hwnd):
+    """
+    File name of the executable owning hwnd (lower case), None if it can't be queried
+    """
+    import ctypes
+    from ctypes import wintypes
+    PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    user32, kernel32 = ctypes.windll.user32, ctypes.windll.kernel32
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+    kernel32.QueryFullProcessImageNameW.argtypes = [wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR,
+                                                    ctypes.POINTER(wintypes.DWORD)]
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+    pid = wintypes.DWORD()
+    user32.GetWindowThreadProcessId(wintypes.HWND(hwnd), ctypes.byref(pid))
+    process = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid.value)
+    if not process:
+        return None
+    try:
+        buffer = ctypes.create_unicode_buffer(1024)
+        size = wintypes.DWORD(len(buffer))
+        if not kernel32.QueryFullProcessImageNameW(process, 0, buffer, ctypes.byref(size)):
+            return None
+        return os.path.basename(buffer.value).lower()
+    finally:
+        kernel32.CloseHandle(process)
+
+
+class FakeWindowProvider(WindowProvider):
+    """
+    Fixed, editable window list for tests and platforms without window enumeration;
+    keys optionally gives {hwnd: profile key} (default: the normalized title)
+    """
+    def __init__(self, windows=None, keys=None):
+        self._windows = dict(windows or {})
+        self.keys = dict(keys or {})
+        self._lock = threading.Lock()
+
+    def profile_key(self, hwnd, title):
+        return self.keys.get(hwnd) or super().profile_key(hwnd, title)
+
+    def set_windows(self, windows):
+        with self._lock:
+            self._windows = dict(windows)
+
+    def windows(self):
+        with self._lock:
+            return dict(self._windows)
+
+
+class WindowRegistry:
+    """
+    Cached {hwnd: title} of the capturable (titled) windows.
+
+    refresh() re-enumerates through the provider and applies only what changed, bumping
+    version when anything did; start() keeps refreshing on a background thread so lookups
+    and grabs never enumerate on the GUI thread. Windows are tracked by handle, so a title
+    that changes (FPS counters, map names) still points at the same window; each handle's
+    profile key is looked up once when it appears and kept while the window lives.
+    """
+    def __init__(self, provider, refresh_interval=REFRESH_INTERVAL):
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._windows = {}
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """
+        Re-enumerate; returns (added, removed, renamed) handles
+        """
+        current = {hwnd: title for hwnd, title in self.provider.windows().items() if title.strip()}
+        with self._lock:
+            new = [hwnd for hwnd in current if hwnd not in self._keys]
+        # outside the lock: querying the owning process may be slow
+        keys = {hwnd: self.provider.profile_key(hwnd, current[hwnd]) for hwnd in new}
+        with self._lock:
+            added = [hwnd for hwnd in current if hwnd not in self._windows]
+            removed = [hwnd for hwnd in self._windows if hwnd not in current]
+            renamed = [hwnd for hwnd, title in current.items()
+                       if hwnd in self._windows and self._windows[hwnd] != title]
+            for hwnd in removed:
+                del self._windows[hwnd]
+                self._keys.pop(hwnd, None)
+            for hwnd in added + renamed:
+                self._windows[hwnd] = current[hwnd]
+            for hwnd in added:
+                # removed and re-added by a concurrent refresh between the two locks
+                self._keys[hwnd] = keys[hwnd] if hwnd in keys else self.provider.profile_key(hwnd, current[hwnd])
+            if added or removed or renamed:
+                self.version += 1
+        return added, removed, renamed
+
+    def windows(self):
+        """
+        Snapshot of the cached {hwnd: title}
+        """
+        with self._lock:
+            return dict(self._windows)
+
+    def title(self, hwnd):
+        with self._lock:
+            return self._windows.get(hwnd)
+
+    def profile_key(self, hwnd):
+        """
+        Stable key of hwnd's application for per-window settings, None for unknown handles
+        """
+        with self._lock:
+            return self._keys.get(hwnd)
+
+    def alive(self, hwnd):
+        with self._lock:
+            return hwnd in self._windows
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="window-registry", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception:
+                # enumeration can fail while windows are being created / destroyed; retry next round
+                pass
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def default_provider():
+    """
+    pygetwindow where it works, otherwise an empty fake (e.g. on Linux, for development)
+    """
+    try:
+        return PyGetWindowProvider()
+    except NotImplementedError:
+        return FakeWindowProvider()